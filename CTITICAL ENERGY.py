@@ -7,66 +7,43 @@ Created on Fri Jul 18 14:27:07 2025
 """
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.integrate import quad
-from scipy.optimize import root_scalar
+from critical_energy import critical_energy
+from power_fraction import ion_power_fraction, ion_power_fraction_inverse
 
 
-def f1(Ne,Zi,Xi,Ai):
-    fv = Ne*Xi*Zi**2/(Ne*Ai)
-    return fv
-
 X_H = 0.05
 X_D = 0.50
 
 X_T = 1-X_D-X_H
 
-Z_D = 1
-a_D = 2
-Z_T = 1
-a_T = 3
-Z_H = 1
-a_H = 1
+# species table: T, D, H (charge, mass number, fraction n_i/n_e)
+Z = np.array([1, 1, 1])
+A = np.array([3, 2, 1])
+X = np.array([X_T, X_D, X_H])
 
 Te = 10e3
 Ne = 1.5e20
-Af = a_D 
+Af = 2  # fast D
 
-Ec = 14.8*Te*Af*(  f1(Ne,Z_T,X_T,a_T)
-                 + f1(Ne,Z_D,X_D,a_D)
-                 + f1(Ne,Z_H,X_T,a_H))**(2/3)
+Ec = critical_energy(Te, Z, A, X, Af)
 
 print(Ec/1e3)
 
 
 #%% REDISTRUBUTION
-# Define the integrand: 1 / (1 + y^(3/2))
-
-def integrand(y):
-    return 1 / (1 + y**1.5)
-
-# Compute p_i(E0), the fraction of energy transferred to ions
-# x = E0 / E_crit (normalized fast particle energy)
-def p_i(x):
-    if x == 0:
-        return 1.0  # Avoid division by zero
-    integral_result, _ = quad(integrand, 0, x)
-    return (1 / x) * integral_result
-
-
+# p_i(x) = 1/x * integral_0^x dy / (1 + y^(3/2)), the fraction of energy
+# transferred to ions, x = E0 / E_crit (normalized fast particle energy),
+# evaluated in closed form (see power_fraction.py)
 
 # Create array of normalized energy values E0/E_crit from 0.01 to 10
 x_vals = np.linspace(0.01, 10, 300)
 
 # Compute power fractions for ions and electrons
-fi_vals = np.array([p_i(x) for x in x_vals])   # F_i: power to ions
+fi_vals = ion_power_fraction(x_vals)           # F_i: power to ions
 fe_vals = 1 - fi_vals                          # F_e: power to electrons
 
 # Solve Fi(x) = 0.5
-def equation_to_solve(x):
-    return p_i(x) - 0.5
-
-sol = root_scalar(equation_to_solve, bracket=[1, 5], method='brentq')
-intersection_x = sol.root  # x where Fi = Fe = 0.5
+intersection_x = ion_power_fraction_inverse(0.5)  # x where Fi = Fe = 0.5
 
 # Plot the results
 plt.figure(figsize=(8, 6))
@@ -12,7 +12,7 @@ Created on Fri Feb 28 16:54:55 2025
 globals().clear()
 import numpy as np
 import matplotlib.pyplot as plt
-from ICRF_parameters import Const
+from resonance import machine_parameters, species_parameters, resonance_frequency
 
 plt.close('all')     #close all figures
 
@@ -38,42 +38,29 @@ mpl.rcParams.update({
 # Setup
 
 # -------- Machine selector --------
-machine = "CFEDR"   # "WEST", "JET", or "CFEDR"
+machine = "CFEDR"   # "WEST", "JET", "CFEDR" (keys of resonance.MACHINES)
 N = 2  # harmonic number
 
 
 
-# --- Device geometry & magnetic field ---
+# --- Device geometry & magnetic field (see resonance.MACHINES) ---
 #RB0 (m) magnetic-axis major radius (R_axis; plasma axis after Shafranov shift)
 #R0  (m) geometric major radius (R_geo)
 #a   (m) minor radius of the plasma cross-section
 #B0  (T) toroidal magnetic field evaluated at R = R0
 
-if machine == "WEST":
-    RB0, R0, a, B0 = 2.5, 2.5, 0.5, 3.657
-elif machine == "JET":
-    RB0, R0, a, B0 = 2.96, 2.96, 0.96, 3.7
-elif machine == "CFEDR":
-    RB0, R0, a, B0 = 8.25, 7.8, 2.5, 6.3
-else:
-    raise ValueError("Unknown machine")
+RB0, R0, a, B0 = machine_parameters(machine)
 
 
 
 # Radius grid
 R = np.linspace(R0 - a, R0 + a, 200)
 
-    
-# Define the resonance frequency function
-def resonance_frequency(Z, A):
-    return  N* 1/(2*np.pi*1e6) * (Z * Const.q0)/(A * Const.m0) * (B0*R0) / R# MHz
-
-# Compute f for different species
-f_H = resonance_frequency(Z=1, A=1)   # Hydrogen (H)
-f_D = resonance_frequency(Z=1, A=2)   # Deuterium (D)
-f_T = resonance_frequency(Z=1, A=3)  # Helium (He)
-f_He = resonance_frequency(Z=2, A=3)  # Helium (He)
-f_Li = resonance_frequency(Z=3, A=7)  # Lithium (Li)
+# Resonance frequencies [MHz] of all species at once, shape (nspecies, nR)
+species = ["H", "D", "T", "He3", "Li7"]
+Z, A = species_parameters(species)
+f_res = resonance_frequency(R, N, Z[:, None], A[:, None], B0, R0) / 1e6
+f_H, f_D, f_T, f_He, f_Li = f_res
 
 # Create the plot
 plt.figure(figsize=(7, 5))
@@ -101,8 +88,8 @@ plt.title(f"{machine}\n{harmonic_str} Frequency vs Resonance Position")
 plt.legend(fontsize=13)
 plt.show()
 
-# Safe index via closest point (no equality assumptions)
-idx_ref = int(np.argmin(np.abs(R - ref_pos)))
+# Exact values at the reference position (no grid lookup)
+f_ref = resonance_frequency(ref_pos, N, Z, A, B0, R0) / 1e6
 
 outline = (f"At magnetic axis = {ref_pos:.2f} (m),"
            if use_axis else
@@ -113,9 +100,9 @@ print(f"""
 {outline}
 
 {which_harm} resonance frequency:
-H   = {f_H[idx_ref]:.1f} (MHz)
-D   = {f_D[idx_ref]:.1f} (MHz)
-T   = {f_T[idx_ref]:.1f} (MHz)
-He3 = {f_He[idx_ref]:.1f} (MHz)
-Li7 = {f_Li[idx_ref]:.1f} (MHz)
+H   = {f_ref[0]:.1f} (MHz)
+D   = {f_ref[1]:.1f} (MHz)
+T   = {f_ref[2]:.1f} (MHz)
+He3 = {f_ref[3]:.1f} (MHz)
+Li7 = {f_ref[4]:.1f} (MHz)
 """)
\ No newline at end of file
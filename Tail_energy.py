@@ -9,6 +9,7 @@ globals().clear()
 import numpy as np
 import matplotlib.pyplot as plt
 from ICRF_parameters import Const
+from tail_scan import tail_parameters
 plt.close('all')     #close all figures
 
 import matplotlib as mpl
@@ -45,18 +46,10 @@ eV_to_J = 1.602e-19         # Electronvolt to joule
 eV_J = Const.eV_to_J
 P_dens_W = P_dens*1e6
 C_mf = C_m / 100
-P_mesh, X_mesh = np.meshgrid(P_dens_W, C_mf)
 
-
-E_particle = Te * 1e3 * eV_J 
-# slowing-down time
-tau_s = 0.012 * A_D * (Te)**1.5 / (Z_D**2 * Ne/ 1e20)
-
-# factor xi
-xi = P_mesh * tau_s / (3 * Ne*X_mesh * E_particle)
-
-#T_eff
-T_eff = Te * (xi+1)
+# slowing-down time tau_s, factor xi and T_eff (see tail_scan.py),
+# shape (concentration, power density) by broadcasting
+tau_s, xi, T_eff = tail_parameters(Te, Ne, P_dens_W[None, :], C_mf[:, None], Z_D, A_D)
 
 
 ##----------plot title--------------
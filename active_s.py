@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Active reflection coefficients, coupling resistances and coupled powers of
+multi-strap antennas (see '3-straps antenna.ipynb').
+
+With forward waves a_j on the straps, the wave reflected at port i is
+b_i = Σ_j S_ij a_j and
+
+    Γ_i  = b_i / a_i                         active reflection coefficient
+    Rc_i = z0 (1 - |Γ_i|) / (1 + |Γ_i|)      coupling resistance
+    P_i  = Rc_i |a_i|² / (2 z0²)             coupled power
+
+For a grid of excitations (phasings × power ratios) and a stack of S
+matrices (frequencies, files) all b_i come from one matrix product, so a
+full phasing scan is one call:
+
+    f, S, z0 = load_touchstone("antenna.s4p")                  # (nf, 4, 4)
+    a = strap_excitation(np.radians(np.arange(360))[:, None],  # (360, 100, 4)
+                         np.linspace(0.5, 2, 100), nports=4)
+    out = active_scan(S, a, z0)                                # (360, 100, nf, 4)
+    out['gamma'], out['Rc'], out['P']
+"""
+
+import numpy as np
+
+
+def strap_excitation(dphi, ratio, nports, ratio_ports=None, amplitude=1.0):
+    """
+    Forward waves of a strap array with a uniform phase step.
+
+        a_n = amplitude · c_n · exp(i n dphi),   n = 0 .. nports-1
+
+    with c_n = ratio on ratio_ports and 1 elsewhere; for two straps this is
+    the notebook convention a_2 = k a_1.
+
+    Parameters:
+      dphi : float or numpy.ndarray
+          Phase difference between adjacent straps [rad].
+      ratio : float or numpy.ndarray
+          Amplitude ratio k of the ratio_ports to the other straps; it
+          broadcasts with dphi (e.g. dphi[:, None] and ratio[None, :]).
+      nports : int
+          Number of straps.
+      ratio_ports : list of int, optional
+          0-based ports fed with the ratio (default: all but the first).
+      amplitude : float
+          Forward-wave amplitude of the reference straps.
+
+    Returns:
+      a : numpy.ndarray
+          Complex array of shape broadcast(dphi, ratio) + (nports,).
+    """
+    dphi = np.asarray(dphi, dtype=float)[..., None]
+    ratio = np.asarray(ratio, dtype=float)[..., None]
+    if ratio_ports is None:
+        ratio_ports = range(1, nports)
+    mask = np.zeros(nports, dtype=bool)
+    mask[list(ratio_ports)] = True
+    c = np.where(mask, ratio, 1.0)
+    return amplitude * c * np.exp(1j * np.arange(nports) * dphi)
+
+
+def active_reflection(S, a):
+    """
+    Active reflection coefficients Γ_i = Σ_j S_ij a_j / a_i.
+
+    Parameters:
+      S : numpy.ndarray
+          S matrices of shape (..., nports, nports), e.g. (nf, n, n) from
+          load.load_touchstone or (nfiles, nf, n, n) from touchstone_batch.
+      a : numpy.ndarray
+          Forward waves of shape (..., nports), e.g. from strap_excitation.
+
+    Returns:
+      gamma : numpy.ndarray
+          Shape a.shape[:-1] + S.shape[:-2] + (nports,); NaN on ports that
+          are not fed (a_i = 0).
+    """
+    S = np.asarray(S)
+    a = np.asarray(a)
+    n = S.shape[-1]
+    if S.ndim < 2 or S.shape[-2] != n or a.shape[-1:] != (n,):
+        raise ValueError("S must be (..., n, n) and a (..., n) with the same n.")
+    # one matrix product: (excitations, n) @ (n, S points · n)
+    b = a.reshape(-1, n) @ S.reshape(-1, n).T
+    b = b.reshape(a.shape[:-1] + S.shape[:-2] + (n,))
+    ai = a.reshape(a.shape[:-1] + (1,) * (S.ndim - 2) + (n,))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ai != 0, b / ai, np.nan)
+
+
+def coupling_resistance(gamma, z0=50.0):
+    """Coupling resistance z0 (1 - |Γ|) / (1 + |Γ|) [Ohm]."""
+    g = np.abs(gamma)
+    return z0 * (1.0 - g) / (1.0 + g)
+
+
+def coupled_power(Rc, a, z0=50.0):
+    """Coupled power Rc |a|² / (2 z0²) [W] for forward-wave amplitudes a [V]."""
+    return Rc * np.abs(a)**2 / (2.0 * z0**2)
+
+
+def active_scan(S, a, z0=50.0, chunk_size=1 << 22, dtype=np.complex128):
+    """
+    Γ, Rc and P of every port for a grid of excitations and S matrices.
+
+    The excitations are processed by chunks so that the temporaries stay
+    of the order of chunk_size values; only the outputs span the full grid.
+
+    Parameters:
+      S : numpy.ndarray
+          S matrices of shape (..., nports, nports).
+      a : numpy.ndarray
+          Forward waves of shape (..., nports).
+      z0 : float
+          Reference impedance in Ohm.
+      chunk_size : int
+          Number of output values (excitation × S point × port) per chunk.
+      dtype : numpy dtype
+          Complex output precision (complex64 halves the memory of large
+          scans; Rc and P use the matching real type).
+
+    Returns:
+      out : dict
+          'gamma', 'Rc' and 'P', each of shape
+          a.shape[:-1] + S.shape[:-2] + (nports,).
+    """
+    S = np.asarray(S)
+    a = np.asarray(a)
+    n = S.shape[-1]
+    grid = a.shape[:-1]
+    per_exc = int(np.prod(S.shape[:-2], dtype=np.int64)) * n
+    shape = grid + S.shape[:-2] + (n,)
+    real = np.finfo(dtype).dtype
+    out = {'gamma': np.empty(shape, dtype=dtype),
+           'Rc': np.empty(shape, dtype=real),
+           'P': np.empty(shape, dtype=real)}
+    flat = {k: v.reshape((-1,) + S.shape[:-2] + (n,)) for k, v in out.items()}
+    a_flat = a.reshape(-1, n)
+    step = max(1, chunk_size // per_exc)
+    for start in range(0, a_flat.shape[0], step):
+        ac = a_flat[start:start + step]
+        sl = slice(start, start + ac.shape[0])
+        gamma = active_reflection(S, ac)
+        Rc = coupling_resistance(gamma, z0)
+        flat['gamma'][sl] = gamma
+        flat['Rc'][sl] = Rc
+        flat['P'][sl] = coupled_power(Rc, ac.reshape(ac.shape[:1] + (1,) * (S.ndim - 2) + (n,)), z0)
+    return out
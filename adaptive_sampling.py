@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive sampling of 1D scans (e.g. the density axis of
+dispersion_relationship.py).
+
+Instead of a fixed log-spaced grid, the scan starts from a few points and
+refines only the intervals where the curves bend (the piecewise-linear
+interpolation error, estimated from neighbouring samples, exceeds tol) or
+change sign, until a point budget is reached. All the new points of one
+pass are evaluated in a single vectorized call, and several curves (e.g.
+k_perp^2 of all branches and compositions stacked on leading axes) share
+the same grid.
+
+    def kperp2(ne):
+        return solve_kperp2(f, B0, ne, kpar, Z, A, frac)[0].real
+
+    ne, k2 = adaptive_sample(kperp2, 1e13, 1e20, tol=0.01, max_points=150)
+"""
+
+import numpy as np
+
+
+def signed_log10(y):
+    """Smooth signed log scale sign(y) log10(1 + |y|) used to measure errors."""
+    return np.sign(y) * np.log10(1.0 + np.abs(y))
+
+
+def _interval_errors(t, z):
+    """
+    Interpolation error estimate of each interval [t_i, t_i+1]: deviation of
+    the samples from the chord of their neighbours (largest over curves).
+    """
+    w = (t[1:-1] - t[:-2]) / (t[2:] - t[:-2])
+    chord = (1.0 - w) * z[..., :-2] + w * z[..., 2:]
+    dev = np.abs(z[..., 1:-1] - chord)
+    dev = dev.reshape(-1, dev.shape[-1]).max(axis=0) if dev.ndim > 1 else dev
+    dev = np.concatenate(([0.0], dev, [0.0]))
+    err = np.maximum(dev[:-1], dev[1:])
+
+    z2 = z.reshape(-1, z.shape[-1])
+    bad = ~np.all(np.isfinite(z2), axis=0)
+    sign = np.any(np.signbit(z2[:, 1:]) != np.signbit(z2[:, :-1]), axis=0)
+    err[sign | bad[1:] | bad[:-1]] = np.inf
+    return np.where(np.isnan(err), np.inf, err)
+
+
+def adaptive_sample(func, x_min, x_max, tol=1e-2, max_points=200, n_init=17,
+                    log=True, transform=signed_log10, min_width=1e-4):
+    """
+    Sample func on [x_min, x_max] with points concentrated where needed.
+
+    Parameters
+    ----------
+    func : callable
+        Vectorized function of a 1D array x returning an array of shape
+        (..., x.size); every leading index is one curve.
+    x_min, x_max : float
+        Scan range.
+    tol : float
+        Target interpolation error in the transformed scale.
+    max_points : int
+        Budget of evaluated points (including the initial ones).
+    n_init : int
+        Number of initial, uniformly spaced points.
+    log : bool
+        Sample uniformly in log10(x) (e.g. for densities).
+    transform : callable or None
+        Scale in which the error is measured (default: signed_log10, the
+        scale of the k_perp^2 plots); None for linear.
+    min_width : float
+        Smallest interval, relative to the scan range (in log10 if log),
+        used to resolve sign changes and singularities.
+
+    Returns
+    -------
+    x : 1D ndarray
+        Sorted sample points.
+    y : ndarray, shape (..., x.size)
+        func(x).
+    """
+    if log:
+        to_t, to_x = np.log10, lambda t: 10.0**t
+    else:
+        to_t, to_x = (lambda x: x), (lambda t: t)
+    transform = transform or (lambda y: y)
+
+    t = np.linspace(to_t(x_min), to_t(x_max), min(n_init, max_points))
+    x = to_x(t)
+    y = np.asarray(func(x), dtype=float)
+    smallest = min_width * abs(t[-1] - t[0])
+
+    err = _interval_errors(t, transform(y))
+    while x.size < max_points:
+        err[np.diff(t) <= smallest] = 0.0
+        todo = np.nonzero(err > tol)[0]
+        if todo.size == 0:
+            break
+        budget = max_points - x.size
+        if todo.size > budget:
+            todo = todo[np.argsort(err[todo])[::-1][:budget]]
+            todo.sort()
+        t_new = 0.5 * (t[todo] + t[todo + 1])
+        x_new = to_x(t_new)
+        y_new = np.asarray(func(x_new), dtype=float)
+
+        # error of the split intervals, measured at their midpoints; the
+        # halves of a smooth interval are expected 4 times more accurate
+        z_lo = transform(y[..., todo])
+        z_hi = transform(y[..., todo + 1])
+        z_mid = transform(y_new)
+        dev = np.abs(z_mid - 0.5 * (z_lo + z_hi))
+        dev = dev.reshape(-1, todo.size).max(axis=0) if dev.ndim > 1 else dev
+        lo_err = 0.25 * dev
+        hi_err = 0.25 * dev
+        z_lo, z_hi, z_mid = (v.reshape(-1, todo.size) for v in (z_lo, z_hi, z_mid))
+        ok_mid = np.all(np.isfinite(z_mid), axis=0)
+        lo_err[np.any(np.signbit(z_lo) != np.signbit(z_mid), axis=0) | ~ok_mid] = np.inf
+        hi_err[np.any(np.signbit(z_mid) != np.signbit(z_hi), axis=0) | ~ok_mid] = np.inf
+        lo_err[np.isnan(lo_err)] = np.inf
+        hi_err[np.isnan(hi_err)] = np.inf
+
+        err[todo] = lo_err
+        err = np.insert(err, todo + 1, hi_err)
+        t = np.insert(t, todo + 1, t_new)
+        x = np.insert(x, todo + 1, x_new)
+        y = np.insert(y, todo + 1, y_new, axis=-1)
+    return x, y
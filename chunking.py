@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Helpers to evaluate broadcast grids by memory-bounded chunks.
+
+A grid is described by its broadcast shape; the inputs are never expanded
+to that shape. Each chunk is a range of flat (C-order) indices, and every
+input is gathered only for the points of the chunk:
+
+    shape = np.broadcast_shapes(f.shape, B.shape, ne.shape)
+    out = np.empty(shape)
+    for sl, idx in broadcast_chunks(shape, 1 << 20):
+        out.reshape(-1)[sl] = model(take_chunk(f, shape, idx),
+                                    take_chunk(B, shape, idx),
+                                    take_chunk(ne, shape, idx))
+"""
+
+import numpy as np
+
+
+def broadcast_chunks(shape, chunk_size):
+    """
+    Split a grid of the given shape in chunks of at most chunk_size points.
+
+    Yields:
+      sl : slice
+          Flat index range of the chunk.
+      idx : tuple of numpy.ndarray
+          Multi-index of the points of the chunk (as np.unravel_index).
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive.")
+    n = int(np.prod(shape, dtype=np.int64))
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        yield slice(start, stop), np.unravel_index(np.arange(start, stop), shape)
+
+
+def take_chunk(x, shape, idx, trailing=0):
+    """
+    Values of x, broadcast to shape (+ its trailing axes), at the chunk idx.
+
+    Parameters:
+      x : array_like
+          Input broadcastable to shape + x.shape[-trailing:].
+      shape : tuple
+          Grid shape.
+      idx : tuple of numpy.ndarray
+          Chunk multi-index from broadcast_chunks.
+      trailing : int
+          Number of trailing axes of x that are not part of the grid
+          (e.g. 1 for a species axis).
+
+    Returns:
+      numpy.ndarray of shape (npoints,) + trailing axes, or the value itself
+      (without the grid axes) when x does not vary over the grid.
+    """
+    x = np.asarray(x)
+    tail = x.shape[x.ndim - trailing:] if trailing else ()
+    grid = x.shape[:x.ndim - trailing]
+    if all(n == 1 for n in grid):
+        return x.reshape(tail)
+    return np.broadcast_to(x, tuple(shape) + tail)[idx]
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cold-plasma dielectric tensor (Stix parameters) on arbitrary grids.
+
+All inputs follow NumPy broadcasting: frequency, magnetic field and density
+can be scalars or arrays of any compatible shapes (e.g. f[:, None, None],
+B[None, :, None], ne[None, None, :]). The ion composition is given by the
+charge and mass numbers of the species and the fractions n_i/n_e along a
+trailing species axis, which can itself carry scan dimensions
+(shape (..., nspecies)). All species are summed in one array operation.
+
+    import numpy as np
+    from cold_plasma import stix_parameters, charge_neutral_fractions
+
+    Z = np.array([1.0, 1.0]);  A = np.array([2.0, 1.0])      # D, H
+    frac = charge_neutral_fractions(Z, [0.95, 0.05])
+    ne = np.logspace(17, 20, 1000)
+    S, D, P, R, L = stix_parameters(62e6, 6.15, ne, Z, A, frac)
+"""
+
+import numpy as np
+from ICRF_parameters import Const, omega_ce, omega_ci, omega_pe, omega_pi
+from chunking import broadcast_chunks, take_chunk
+
+# bit flags returned by kperp2_roots / solve_kperp2
+RESONANCE = 1     # S ~ 0: one root goes to infinity
+CONFLUENCE = 2    # discriminant ~ 0: the two roots merge (mode conversion)
+
+
+def species_arrays(ions):
+    """
+    Convert a list of species dicts {'Z':..., 'A':..., 'xi':...}
+    (as used in dispersion_relationship.py) into arrays Z, A, xi.
+    """
+    Z = np.array([sp["Z"] for sp in ions], dtype=float)
+    A = np.array([sp["A"] for sp in ions], dtype=float)
+    xi = np.array([sp["xi"] for sp in ions], dtype=float)
+    return Z, A, xi
+
+
+def charge_neutral_fractions(Z, xi):
+    """
+    Normalize relative weights xi into fractions r_i = n_i/n_e such that
+    sum_i Z_i r_i = 1 (charge neutrality).
+
+    Parameters
+    ----------
+    Z : array_like, shape (nspecies,)
+        Charge numbers.
+    xi : array_like, shape (..., nspecies)
+        Relative weights; leading axes are kept (composition scans).
+    """
+    Z = np.asarray(Z, dtype=float)
+    xi = np.asarray(xi, dtype=float)
+    sumZxi = np.sum(Z * xi, axis=-1, keepdims=True)
+    return xi / np.where(sumZxi != 0, sumZxi, 1.0)
+
+
+def stix_parameters(f, B, ne, Z, A, frac, out=None, dtype=np.float64):
+    """
+    Stix parameters S, D, P, R, L of a cold multi-species plasma.
+
+    Parameters
+    ----------
+    f : float or ndarray
+        Wave frequency [Hz].
+    B : float or ndarray
+        Magnetic field [T].
+    ne : float or ndarray
+        Electron density [m^-3].
+    Z, A : array_like, shape (nspecies,)
+        Ion charge and mass numbers.
+    frac : array_like, shape (..., nspecies)
+        Ion fractions n_i/n_e (see charge_neutral_fractions).
+    out : tuple of 5 ndarray, optional
+        Buffers for S, D, P, R, L with the broadcast shape of the inputs.
+    dtype : numpy dtype
+        Working precision, np.float64 (default) or np.float32.
+
+    Returns
+    -------
+    S, D, P, R, L : ndarray
+        Arrays with the broadcast shape of f, B, ne and frac[..., 0].
+    """
+    dtype = np.dtype(dtype)
+    f = np.asarray(f, dtype=dtype)
+    B = np.asarray(B, dtype=dtype)
+    ne = np.asarray(ne, dtype=dtype)
+    Z = np.asarray(Z, dtype=dtype)
+    A = np.asarray(A, dtype=dtype)
+    frac = np.asarray(frac, dtype=dtype)
+    if Z.ndim != 1 or Z.shape != A.shape or frac.shape[-1:] != Z.shape:
+        raise ValueError("Z and A must be 1D of length nspecies and frac must "
+                         "have a trailing axis of the same length.")
+
+    # per-species coefficients, from the unit-field/unit-density values
+    c_ci = omega_ci(1.0, Z=Z, A=A).astype(dtype)        # Ω_ci / B
+    c_pi = (omega_pi(1.0, Z=Z, A=A)**2).astype(dtype)   # ω_pi^2 / n_i
+
+    om = 2.0 * np.pi * f
+    om2 = om * om
+
+    # electrons (ω_ce is signed, negative)
+    Oce = omega_ce(B).astype(dtype, copy=False)
+    ope2 = (omega_pe(1.0)**2 * ne).astype(dtype, copy=False)
+    chi_e = ope2 / (om2 - Oce * Oce)
+
+    # ions, all species at once along the trailing axis
+    Oci = B[..., None] * c_ci
+    opi2 = (ne[..., None] * frac) * c_pi
+    chi_i = opi2 / (om2[..., None] - Oci * Oci)
+
+    shape = np.broadcast_shapes(f.shape, B.shape, ne.shape, frac.shape[:-1])
+    if out is None:
+        out = tuple(np.empty(shape, dtype=dtype) for _ in range(5))
+    S, D, P, R, L = out
+
+    np.subtract(1.0, chi_e + chi_i.sum(axis=-1), out=S)
+    np.divide(Oce * chi_e + np.einsum('...s,...s->...', Oci, chi_i), om, out=D)
+    np.subtract(1.0, (ope2 + opi2.sum(axis=-1)) / om2, out=P)
+    np.add(S, D, out=R)
+    np.subtract(S, D, out=L)
+    return S, D, P, R, L
+
+
+def kperp2_roots(S, D, P, R, L, k0, kpar, tol=1e-6):
+    """
+    Both roots k_perp^2 of the cold-plasma dispersion relation
+
+        S k⊥^4 + b k⊥^2 + c = 0,
+        b = -[(k0^2 S - k∥^2)(S + P) - k0^2 D^2],
+        c = P (k0^2 R - k∥^2)(k0^2 L - k∥^2),
+
+    computed without dividing the coefficients by S and without
+    catastrophic cancellation: the larger root is q/S and the other one
+    c/q with q = -(b + sign·sqrt(b^2 - 4 S c))/2. The root order follows
+    dispersion_relationship.py: root 1 is (-b - sqrt)/2 ("fast"),
+    root 2 is (-b + sqrt)/2 ("slow") in the form normalized by S.
+
+    Parameters
+    ----------
+    S, D, P, R, L : ndarray
+        Stix parameters (see stix_parameters).
+    k0 : float or ndarray
+        Vacuum wavenumber ω/c [m^-1].
+    kpar : float or ndarray
+        Parallel wavenumber [m^-1].
+    tol : float
+        Relative tolerance used to flag near-singular points.
+
+    Returns
+    -------
+    k2_1, k2_2 : complex ndarray
+        Roots k_perp^2 [m^-2]; a root is inf where S = 0 exactly.
+    flags : int8 ndarray
+        RESONANCE and/or CONFLUENCE bits for near-singular points.
+    """
+    k02 = k0 * k0
+    kpar2 = kpar * kpar
+    a = S
+    b = -((k02 * S - kpar2) * (S + P) - k02 * D * D)
+    c = P * (k02 * R - kpar2) * (k02 * L - kpar2)
+
+    disc = (b * b - 4.0 * a * c).astype(np.result_type(b, 1j))
+    # sign of S reproduces the root order of the S-normalized form
+    sq = np.sqrt(disc) * np.where(a < 0, -1.0, 1.0)
+    plus = np.real(np.conj(b) * sq) >= 0
+    q = -0.5 * (b + np.where(plus, sq, -sq))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        big = q / a
+        small = c / q
+    small = np.where(q == 0, 0.0, small)
+    k2_1 = np.where(plus, big, small)
+    k2_2 = np.where(plus, small, big)
+
+    # S = (R + L)/2 is small compared to its two terms near a resonance
+    flags = np.zeros(np.shape(k2_1), dtype=np.int8)
+    flags |= np.where(np.abs(S) <= tol * (np.abs(R) + np.abs(L)),
+                      RESONANCE, 0).astype(np.int8)
+    flags |= np.where(np.abs(disc) <= tol * (b * b + 4.0 * np.abs(a * c)),
+                      CONFLUENCE, 0).astype(np.int8)
+    return k2_1, k2_2, flags
+
+
+def solve_kperp2(f, B, ne, kpar, Z, A, frac, chunk_size=1 << 20, tol=1e-6,
+                 dtype=np.float64):
+    """
+    Cold-plasma k_perp^2 roots over an arbitrary broadcast grid.
+
+    The grid spanned by f, B, ne, kpar and frac[..., 0] is never expanded
+    in memory: Stix parameters and roots are evaluated by chunks of at most
+    chunk_size points and written into the outputs.
+
+    Parameters
+    ----------
+    f, B, ne, kpar : float or ndarray
+        Frequency [Hz], magnetic field [T], electron density [m^-3] and
+        parallel wavenumber [m^-1].
+    Z, A, frac : see stix_parameters.
+    chunk_size : int
+        Number of grid points evaluated at once.
+    tol : float
+        Relative tolerance used to flag near-singular points.
+    dtype : numpy dtype
+        Working precision of the Stix parameters.
+
+    Returns
+    -------
+    k2_1, k2_2 : complex ndarray
+        Roots k_perp^2 [m^-2] (root 1 "fast", root 2 "slow").
+    flags : int8 ndarray
+        RESONANCE / CONFLUENCE bits, see kperp2_roots.
+    """
+    frac = np.asarray(frac)
+    shape = np.broadcast_shapes(np.shape(f), np.shape(B), np.shape(ne),
+                                np.shape(kpar), frac.shape[:-1])
+    ctype = np.result_type(dtype, 1j)
+    k2_1 = np.empty(shape, dtype=ctype)
+    k2_2 = np.empty(shape, dtype=ctype)
+    flags = np.empty(shape, dtype=np.int8)
+
+    for sl, idx in broadcast_chunks(shape, chunk_size):
+        fc = take_chunk(f, shape, idx)
+        SDPRL = stix_parameters(fc, take_chunk(B, shape, idx),
+                                take_chunk(ne, shape, idx), Z, A,
+                                take_chunk(frac, shape, idx, trailing=1),
+                                dtype=dtype)
+        k0 = 2.0 * np.pi * np.asarray(fc, dtype=dtype) / Const.c
+        r1, r2, fl = kperp2_roots(*SDPRL, k0, take_chunk(kpar, shape, idx), tol=tol)
+        k2_1.reshape(-1)[sl] = r1
+        k2_2.reshape(-1)[sl] = r2
+        flags.reshape(-1)[sl] = fl
+    return k2_1, k2_2, flags
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Critical energy of fast ions and their power split over profiles.
+
+    Ec = 14.8 Te A_f (Σ_i n_i Z_i² / (n_e A_i))^(2/3)
+
+is the fast-ion energy at which the collisional power transferred to the
+bulk ions equals that to the electrons (Stix). Te, the ion fractions and
+the fast-ion energy broadcast together: profiles (..., nR), time slices and
+composition scans are evaluated in one call, the species being a trailing
+axis as in cold_plasma.py.
+
+    from critical_energy import critical_energy, fast_ion_power_split
+    Z, A = species_parameters(["D", "T", "H"])          # resonance.py
+    frac = np.array([0.50, 0.45, 0.05])                  # n_i / n_e
+    Ec = critical_energy(Te, Z, A, frac, A_fast=2)       # Te: (nt, nR) [eV]
+    Ec, p_i, p_e = fast_ion_power_split(E0, Te, Z, A, frac, A_fast=1)
+"""
+
+import numpy as np
+from power_fraction import ion_power_fraction
+
+
+def critical_energy(Te, Z, A, frac, A_fast, ne=None):
+    """
+    Critical energy Ec [eV].
+
+    Parameters
+    ----------
+    Te : float or ndarray
+        Electron temperature [eV].
+    Z, A : array_like, shape (nspecies,)
+        Charge and mass numbers of the bulk ions.
+    frac : array_like, shape (..., nspecies)
+        Ion fractions n_i/n_e; with ne given, ion densities n_i [m^-3].
+    A_fast : float or ndarray
+        Mass number of the fast ions.
+    ne : float or ndarray, optional
+        Electron density [m^-3] (shape (...)) when frac holds densities.
+        Ec depends on the densities only through n_i/n_e.
+
+    Returns
+    -------
+    Ec : float or ndarray
+        Broadcast shape of Te, A_fast, ne and frac[..., 0].
+    """
+    Z = np.asarray(Z, dtype=float)
+    A = np.asarray(A, dtype=float)
+    frac = np.asarray(frac, dtype=float)
+    if Z.ndim != 1 or Z.shape != A.shape or frac.shape[-1:] != Z.shape:
+        raise ValueError("Z and A must be 1D of length nspecies and frac must "
+                         "have a trailing axis of the same length.")
+    s = frac @ (Z * Z / A)
+    if ne is not None:
+        s = s / np.asarray(ne, dtype=float)
+    return 14.8 * np.asarray(Te, dtype=float) * np.asarray(A_fast, dtype=float) * s**(2.0 / 3.0)
+
+
+def fast_ion_power_split(E0, Te, Z, A, frac, A_fast, ne=None):
+    """
+    Critical energy and power fractions of fast ions of energy E0 [eV].
+
+    Parameters
+    ----------
+    E0 : float or ndarray
+        Fast-ion energy [eV].
+    Te, Z, A, frac, A_fast, ne : see critical_energy.
+
+    Returns
+    -------
+    Ec : ndarray
+        Critical energy [eV].
+    p_i, p_e : ndarray
+        Fractions of the energy transferred to the bulk ions and electrons
+        (see power_fraction.ion_power_fraction), broadcast shape of E0
+        and Ec.
+    """
+    Ec = critical_energy(Te, Z, A, frac, A_fast, ne=ne)
+    p_i = ion_power_fraction(np.asarray(E0, dtype=float) / Ec)
+    return Ec, p_i, 1.0 - p_i
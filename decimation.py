@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shape-preserving decimation of dense traces before plotting.
+
+Largest-triangle-three-buckets (LTTB) splits a trace in buckets and keeps
+from each the point forming the largest triangle with the point kept in
+the previous bucket and the centroid of the next one, so corners and loops
+survive while the nearly collinear points of smooth stretches are dropped.
+The end points are always kept.
+
+The buckets are of equal arc length along the trace (in coordinates
+scaled by their range) rather than of equal numbers of points: a resonance
+loop traversed within a few hundred of a million frequency points still
+gets its share of the kept points. For S-parameters the trace is thinned
+in the complex plane (the Smith chart), and the minimum of |S| of every
+bucket is kept as well, so resonance dips in |S11| are never lost:
+
+    from decimation import decimate_s
+    idx = decimate_s(S[:, 0, 0], n_out=2000)
+    smith_traces(S[idx, 0, 0]);  plt.plot(f[idx], np.abs(S[idx, 0, 0]))
+
+The returned indices apply to the frequency axis and to every S_ij alike.
+"""
+
+import numpy as np
+
+
+def bucket_edges(x, y, n_out, arc_length=True):
+    """
+    Start indices of the inner buckets of a trace of len(x) points, followed
+    by the last index; n_out - 2 buckets (fewer if some would be empty).
+
+    With arc_length the buckets span equal lengths of the trace in the
+    plane of x and y scaled by their ranges, otherwise equal numbers of
+    points.
+    """
+    npts = np.size(x)
+    if not arc_length:
+        return np.unique(np.linspace(1, npts - 1, n_out - 1).astype(np.int64))
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    span_x = np.ptp(x) or 1.0
+    span_y = np.ptp(y) or 1.0
+    s = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x) / span_x,
+                                                  np.diff(y) / span_y))))
+    inner = s[1:-1]
+    edges = 1 + np.searchsorted(inner, np.linspace(0.0, s[-1], n_out - 1)[:-1])
+    return np.unique(np.append(np.clip(edges, 1, npts - 1), npts - 1))
+
+
+def lttb_indices(x, y, n_out, arc_length=True):
+    """
+    Indices of the points kept by largest-triangle-three-buckets.
+
+    Parameters
+    ----------
+    x, y : 1D ndarray
+        Trace coordinates (e.g. frequency and |S|, or Re S and Im S).
+    n_out : int
+        Number of points to keep (>= 3; fewer may be returned).
+    arc_length : bool
+        Buckets of equal arc length (default) or equal point counts.
+
+    Returns
+    -------
+    idx : 1D int ndarray
+        Increasing indices, starting at 0 and ending at len(x) - 1.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    npts = x.size
+    if n_out >= npts or n_out < 3:
+        return np.arange(npts)
+
+    edges = bucket_edges(x, y, n_out, arc_length)
+    nb = edges.size - 1
+    # centroid of every bucket, the last "bucket" being the end point
+    counts = np.diff(edges, append=npts)
+    cx = np.add.reduceat(x, edges) / counts
+    cy = np.add.reduceat(y, edges) / counts
+
+    idx = np.empty(nb + 2, dtype=np.int64)
+    idx[0], idx[-1] = 0, npts - 1
+    a = 0
+    for k in range(nb):
+        lo, hi = edges[k], edges[k + 1]
+        # twice the triangle area (a, point, centroid of the next bucket)
+        area = np.abs((x[a] - cx[k + 1]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (cy[k + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[k + 1] = a
+    return idx
+
+
+def bucket_minima(v, edges):
+    """Index of the smallest value of v in each bucket of bucket_edges."""
+    v = np.asarray(v, dtype=float)
+    npts = v.size
+    bucket = np.searchsorted(edges, np.arange(1, npts - 1), side='right') - 1
+    order = np.lexsort((v[1:-1], bucket))
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = bucket[order][1:] != bucket[order][:-1]
+    return order[first] + 1
+
+
+def decimate_s(S, n_out=2000, keep_min=True, f=None):
+    """
+    Indices that thin S-parameter traces while preserving their shape.
+
+    Parameters
+    ----------
+    S : complex array_like
+        Shape (npts,) or (npts, ...) (e.g. a stacked S matrix); every trace
+        along the first axis is thinned and the indices are merged.
+    n_out : int
+        Target number of LTTB points per trace.
+    keep_min : bool
+        Also keep the smallest |S| of every bucket (resonance dips).
+    f : 1D ndarray, optional
+        Thin the curves |S|(f) of a line plot instead of the loci in the
+        complex plane.
+
+    Returns
+    -------
+    idx : 1D int ndarray
+        Sorted indices along the first axis, including both end points.
+    """
+    S = np.asarray(S)
+    traces = S.reshape(S.shape[0], -1)
+    if n_out >= S.shape[0] or n_out < 3:
+        return np.arange(S.shape[0])
+    keep = []
+    for k in range(traces.shape[1]):
+        s = traces[:, k]
+        x, y = (s.real, s.imag) if f is None else (f, np.abs(s))
+        keep.append(lttb_indices(x, y, n_out))
+        if keep_min:
+            keep.append(bucket_minima(np.abs(s), bucket_edges(x, y, n_out)))
+    return np.unique(np.concatenate(keep))
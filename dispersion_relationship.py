@@ -5,7 +5,8 @@
 globals().clear()
 import numpy as np
 import matplotlib.pyplot as plt
-from ICRF_parameters import Const, omega_ce, omega_ci, omega_pe, omega_pi, vth_e, vth_i, rho_e, lambda_D
+from ICRF_parameters import Const, vth_e, vth_i, rho_e, lambda_D
+from cold_plasma import species_arrays, charge_neutral_fractions, stix_parameters, kperp2_roots
 plt.close('all')     #close all figures
 
 # ---------------- 参数区 ----------------
@@ -45,32 +46,16 @@ om = 2.0 * pi * f
 k0 = om / c0
 k02 = k0**2
 
-# Electron terms
-Oce = omega_ce(B0)        # scalar [rad/s]
-ope = omega_pe(Ne)         # array [rad/s]
-
 # Charge-neutral normalization: xi -> r_i = n_i/n_e
-sumZxi = sum(sp["Z"] * sp["xi"] for sp in ions)
-scale  = 1.0 / (sumZxi if sumZxi != 0 else 1.0)
-for sp in ions:
-    sp["xi_eff"] = sp["xi"] * scale         # ensures sum Z*xi_eff = 1
-    sp["Ni"]     = sp["xi_eff"] * Ne        # ion density array [m^-3]
-    sp["Oci"]    = omega_ci(B0, Z=sp["Z"], A=sp["A"])        # scalar [rad/s]
-    sp["opi"]    = omega_pi(sp["Ni"], Z=sp["Z"], A=sp["A"])  # array  [rad/s]
+Z_i, A_i, xi_i = species_arrays(ions)
+r_i = charge_neutral_fractions(Z_i, xi_i)   # ensures sum Z*r_i = 1
+for sp, r in zip(ions, r_i):
+    sp["xi_eff"] = r
 
 # =========================
-# Stix tensor (multi-species sums)
+# Stix tensor (all species summed at once, see cold_plasma.py)
 # =========================
-den_e = om**2 - Oce**2
-S = 1.0 - ope**2 / den_e
-D = (Oce/om) * ope**2 / den_e
-P = 1.0 - (ope/om)**2
-
-for sp in ions:
-    den_i = om**2 - sp["Oci"]**2
-    S -= sp["opi"]**2 / den_i
-    D += (sp["Oci"]/om) * sp["opi"]**2 / den_i
-    P -= (sp["opi"]/om)**2
+S, D, P, R, L = stix_parameters(f, B0, Ne, Z_i, A_i, r_i)
 
 
 # =========================
@@ -81,13 +66,10 @@ den_fast = (k02*S - kpar**2)
 kfast2   = num_fast / den_fast
 kslow2   = P * (k02*S - kpar**2) / S
 
-a4 = 1.0
-b4 = -(((S**2 - D**2)/S + P) * k02 - (P/S + 1.0) * kpar**2)
-c4 = P * (k02**2 * (S**2 - D**2)/S + kpar**4 / S - 2.0 * k02 * kpar**2)
-D4 = b4**2 - 4.0 * a4 * c4
-sqrtD4 = np.sqrt(D4 + 0j)  # allow complex, then take real part
-kfast2_full = np.real((-b4 - sqrtD4) / (2.0 * a4))
-kslow2_full = np.real((-b4 + sqrtD4) / (2.0 * a4))
+# full 4th-order roots, cancellation-free (flags mark S ~ 0 / merging roots)
+k2_1, k2_2, flags = kperp2_roots(S, D, P, R, L, k0, kpar)
+kfast2_full = np.real(k2_1)
+kslow2_full = np.real(k2_2)
 
 # =========================
 # Helper scales (do not enter S, D, P)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Frequency planning for multi-species ICRF heating scenarios.
+
+Every (f, B0) pair of a generator band and a field range is evaluated at
+once with the analytic resonance radii of resonance.py, checked against
+constraints on where the resonance layers must lie, and the feasible
+operating points are returned ranked.
+
+    from frequency_plan import plan_frequencies
+    plan = plan_frequencies("WEST", (30e6, 65e6), (3.0, 3.9),
+                            {("He3", 1): "axis",
+                             ("H", 1): "outside",
+                             ("D", 1): "outside"}, margin=0.02)
+    plan['f'][0], plan['B0'][0]     # best point
+
+Constraints map (species, harmonic) to:
+    'inside'   layer within R0 ± a
+    'outside'  layer out of R0 ± a (by at least margin)
+    'axis'     layer inside, as close as possible to the magnetic axis RB0
+    float      layer inside, as close as possible to this radius [m]
+"""
+
+import numpy as np
+from resonance import machine_parameters, species_parameters, resonance_radius
+
+CONSTRAINTS = ('inside', 'outside', 'axis')
+
+
+def _parse_constraints(constraints, RB0):
+    """Split the constraint dict into species, harmonics and per-layer kinds."""
+    if not constraints:
+        raise ValueError("At least one constraint is required.")
+    names, harm, kind, target = [], [], [], []
+    for (name, n), c in constraints.items():
+        names.append(name)
+        harm.append(n)
+        if isinstance(c, str):
+            if c not in CONSTRAINTS:
+                raise ValueError(f"Unknown constraint '{c}', expected one of "
+                                 f"{CONSTRAINTS} or a radius.")
+            kind.append(c)
+            target.append(RB0 if c == 'axis' else np.nan)
+        else:
+            kind.append('target')
+            target.append(float(c))
+    Z, A = species_parameters(names)
+    return Z, A, np.array(harm, dtype=float), np.array(kind), np.array(target)
+
+
+def plan_frequencies(machine, f_band, B0_range, constraints, nf=701, nB=91,
+                     margin=0.0, max_points=None):
+    """
+    Rank the (f, B0) operating points satisfying resonance-layer constraints.
+
+    Parameters
+    ----------
+    machine : str or dict
+        Key of resonance.MACHINES, or a dict with 'RB0', 'R0', 'a' (and 'B0').
+    f_band : (float, float) or 1D ndarray
+        Generator band [Hz] (sampled with nf points) or explicit frequencies.
+    B0_range : (float, float), 1D ndarray or None
+        Field range at R0 [T] (sampled with nB points), explicit values, or
+        None for the nominal field of the machine.
+    constraints : dict
+        {(species, harmonic): 'inside' | 'outside' | 'axis' | radius}, see
+        the module docstring; species are keys of resonance.SPECIES.
+    nf, nB : int
+        Samples of the band and of the field range.
+    margin : float
+        Distance [m] required between 'outside' layers and the plasma edge.
+    max_points : int, optional
+        Keep only the best max_points operating points.
+
+    Returns
+    -------
+    plan : dict of ndarray, sorted from best to worst
+        'f', 'B0' : operating points, shape (npoint,)
+        'R_res' : layer radii [m], shape (npoint, nconstraint), in the order
+            of the constraints
+        'error' : sum of the distances [m] of the targeted layers
+            ('axis' or radius) to their target
+        'clearance' : smallest distance [m] of the 'outside' layers to the
+            plasma edge (inf if none); ties on error are ranked by it
+        'layers' : list of the (species, harmonic) keys
+    """
+    if isinstance(machine, str):
+        RB0, R0, a, B0_nom = machine_parameters(machine)
+    else:
+        RB0, R0, a = (float(machine[k]) for k in ('RB0', 'R0', 'a'))
+        B0_nom = machine.get('B0', np.nan)
+
+    def _grid(v, n):
+        v = np.atleast_1d(np.asarray(v, dtype=float))
+        return np.linspace(v[0], v[1], n) if v.size == 2 else v
+
+    f = _grid(f_band, nf)
+    B0 = np.array([B0_nom]) if B0_range is None else _grid(B0_range, nB)
+    Z, A, n, kind, target = _parse_constraints(constraints, RB0)
+
+    # (nf, nB, nconstraint) in one evaluation
+    R = resonance_radius(f[:, None, None], n, Z, A, B0[None, :, None], R0)
+    inside = np.abs(R - R0) <= a
+    dist_out = np.abs(R - R0) - a
+    must_in = kind != 'outside'
+    ok = np.all(np.where(must_in, inside, dist_out >= margin), axis=-1)
+
+    error = np.where(np.isnan(target), 0.0, np.abs(R - target)).sum(axis=-1)
+    clearance = np.where(kind == 'outside', dist_out, np.inf).min(axis=-1)
+
+    i_f, i_B = np.nonzero(ok)
+    err, clr = error[i_f, i_B], clearance[i_f, i_B]
+    order = np.lexsort((-clr, err))
+    if max_points is not None:
+        order = order[:max_points]
+    i_f, i_B = i_f[order], i_B[order]
+    return {'f': f[i_f], 'B0': B0[i_B], 'R_res': R[i_f, i_B],
+            'error': err[order], 'clearance': clr[order],
+            'layers': list(constraints)}
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hot (Maxwellian) plasma dielectric tensor and k_perp solver.
+
+Extends cold_plasma.py with finite temperature: the susceptibility of each
+species is a sum over cyclotron harmonics n of modified Bessel functions
+Λ_n(λ) = I_n(λ) e^{-λ}, λ = (k⊥ ρ)^2, and of the plasma dispersion
+function Z(ζ_n), ζ_n = (ω - nΩ)/(|k∥| v_t), v_t = sqrt(2T/m).
+
+    K_xx = 1 + Σ_s (ω_p²/ω²) ζ_0 Σ_n n²Λ_n/λ Z(ζ_n)
+    K_xy = i Σ_s (ω_p²/ω²) ζ_0 Σ_n n Λ_n' Z(ζ_n)                 = -K_yx
+    K_yy = 1 + Σ_s (ω_p²/ω²) ζ_0 Σ_n (n²Λ_n/λ - 2λΛ_n') Z(ζ_n)
+    K_xz = Σ_s (ω_p²/ω²) ζ_0 (k⊥v_t/Ω) Σ_n (nΛ_n/λ) (1 + ζ_n Z(ζ_n)) =  K_zx
+    K_yz = i Σ_s (ω_p²/ω²) ζ_0 (k⊥v_t/Ω) Σ_n Λ_n' (1 + ζ_n Z(ζ_n))  = -K_zy
+    K_zz = 1 + 2 Σ_s (ω_p²/ω²) ζ_0 Σ_n Λ_n ζ_n (1 + ζ_n Z(ζ_n))
+
+Ω is signed (negative for electrons), so the cold limit gives back S, -iD
+and P of cold_plasma.py. Z is evaluated with Weideman's rational
+approximation, whose coefficients are computed once and cached, and all
+species and harmonics are evaluated in the same array operations.
+"""
+
+from functools import lru_cache
+import numpy as np
+from scipy.special import dawsn, ive
+from ICRF_parameters import (Const, omega_ce, omega_ci, omega_pe, omega_pi,
+                             vth_e, vth_i)
+from chunking import broadcast_chunks, take_chunk
+from cold_plasma import stix_parameters
+
+
+@lru_cache(maxsize=None)
+def _weideman_coefficients(nterms):
+    """Coefficients of Weideman's (1994) rational approximation of w(z)."""
+    M = 2 * nterms
+    k = np.arange(-M + 1, M)
+    L = np.sqrt(nterms / np.sqrt(2.0))
+    t = L * np.tan(k * np.pi / (2 * M))
+    f = np.concatenate(([0.0], np.exp(-t**2) * (L**2 + t**2)))
+    a = np.real(np.fft.fft(np.fft.fftshift(f))) / (2 * M)
+    return L, a[1:nterms + 1][::-1].copy()
+
+
+def faddeeva(z, nterms=24):
+    """
+    Faddeeva function w(z) = exp(-z^2) erfc(-iz).
+
+    Uses a rational approximation with nterms terms (relative error about
+    4e-7 for 16, 4e-10 for 24 and 3e-13 for 32 terms).
+    """
+    z = np.asarray(z, dtype=complex)
+    L, a = _weideman_coefficients(nterms)
+    lower = z.imag < 0
+    zu = np.where(lower, -z, z)        # w(-z) = 2 exp(-z^2) - w(z)
+    den = L - 1j * zu
+    X = (L + 1j * zu) / den
+    p = np.full_like(X, a[0])
+    for coef in a[1:]:                 # Horner scheme
+        p *= X
+        p += coef
+    w = 2.0 * p / den**2 + (1.0 / np.sqrt(np.pi)) / den
+    if np.any(lower):
+        w = np.where(lower, 2.0 * np.exp(-z * z) - w, w)
+    return w
+
+
+def plasma_dispersion_Z(zeta, nterms=24):
+    """
+    Plasma dispersion function Z(ζ) = i sqrt(π) w(ζ).
+
+    For real ζ (real ω and k∥) the closed form i sqrt(π) exp(-ζ²) - 2 F(ζ),
+    with F the Dawson integral, is used; complex ζ goes through faddeeva.
+    """
+    if np.isrealobj(zeta):
+        zeta = np.asarray(zeta, dtype=float)
+        return 1j * np.sqrt(np.pi) * np.exp(-zeta * zeta) - 2.0 * dawsn(zeta)
+    return 1j * np.sqrt(np.pi) * faddeeva(zeta, nterms)
+
+
+def _species_coefficients(Z, A):
+    """
+    Per-species coefficients (electrons first): Ω/B, ω_p²/n and v_t/sqrt(T),
+    from the ICRF_parameters helpers at unit field, density and temperature.
+    """
+    Z = np.asarray(Z, dtype=float)
+    A = np.asarray(A, dtype=float)
+    c_om = np.concatenate(([omega_ce(1.0)], omega_ci(1.0, Z=Z, A=A)))
+    c_wp = np.concatenate(([omega_pe(1.0)**2], omega_pi(1.0, Z=Z, A=A)**2))
+    c_vt = np.concatenate(([vth_e(1.0, oneD=False)], vth_i(1.0, A=A, oneD=False)))
+    return c_om, c_wp, c_vt
+
+
+def _bessel_lambda(lam, nmax):
+    """
+    Λ_m(λ) = I_m(λ) e^{-λ} for m = 0..nmax (last axis), from two calls to
+    scipy.special.ive and the downward recurrence
+    Λ_{m-1} = Λ_{m+1} + 2m Λ_m / λ, which is stable for any λ. Points where
+    Λ_nmax underflows (λ -> 0) are evaluated directly.
+    """
+    lam = np.asarray(lam)
+    out = np.empty(lam.shape + (nmax + 1,), dtype=np.result_type(lam, float))
+    out[..., nmax] = ive(nmax, lam)
+    tiny = np.abs(out[..., nmax]) < 1e-280
+    lam_safe = np.where(tiny, 1.0, lam)
+    hi = ive(nmax + 1, lam)
+    for m in range(nmax, 0, -1):
+        out[..., m - 1] = hi + 2.0 * m * (out[..., m] / lam_safe)
+        hi = out[..., m]
+    if np.any(tiny):
+        out[tiny] = ive(np.arange(nmax + 1), lam[tiny][:, None])
+    return out
+
+
+def _grid_shape(frac, *args):
+    return np.broadcast_shapes(np.shape(frac)[:-1], *(np.shape(a) for a in args))
+
+
+def _tensor(f, B, ne, kpar, kperp, frac, Te, Ti, coefs, nharm, nterms):
+    """Dielectric tensor (npoints, 3, 3) of one chunk of flat inputs."""
+    c_om, c_wp, c_vt = coefs
+    shape = _grid_shape(frac, f, B, ne, kpar, kperp, Te, Ti)
+    om = 2.0 * np.pi * np.asarray(f, dtype=float)[..., None]
+    kpar = np.asarray(kpar, dtype=float)[..., None]
+    kperp = np.asarray(kperp)[..., None]
+    ne = np.asarray(ne, dtype=float)[..., None]
+    frac = np.asarray(frac, dtype=float)
+    n_s = ne * np.concatenate((np.ones(frac.shape[:-1] + (1,)), frac), axis=-1)
+    T_s = np.concatenate((np.asarray(Te, dtype=float)[..., None],
+                          np.broadcast_to(np.asarray(Ti, dtype=float)[..., None],
+                                          np.shape(Ti) + (frac.shape[-1],))),
+                         axis=-1)
+
+    # species axis s
+    Om = np.asarray(B, dtype=float)[..., None] * c_om
+    wp2_w2 = n_s * c_wp / om**2
+    vt = np.sqrt(T_s) * c_vt
+    akpar = np.abs(kpar)
+    zeta0 = om / (akpar * vt)
+    lam = kperp**2 * vt**2 / (2.0 * Om**2)
+    kv_Om = kperp * vt / Om * np.sign(kpar)
+
+    # harmonic axis h, n = -nharm..nharm; Λ_n = Λ_-n
+    n = np.arange(-nharm, nharm + 1)
+    lam_h = lam[..., None]
+    Lm = _bessel_lambda(lam, nharm + 1)                    # |n| = 0..nharm+1
+    Lam = Lm[..., np.abs(n)]
+    Lam_lo = Lm[..., np.abs(n - 1)]
+    Lam_hi = Lm[..., np.abs(n + 1)]
+    dLam = 0.5 * (Lam_lo + Lam_hi) - Lam                   # Λ_n'
+    nLam_lam = 0.5 * (Lam_lo - Lam_hi)                     # n Λ_n / λ
+
+    zeta = (om[..., None] - n * Om[..., None]) / (akpar * vt)[..., None]
+    Zf = plasma_dispersion_Z(zeta, nterms)
+    pref = (wp2_w2 * zeta0)[..., None]
+    PZ = pref * Zf
+    PW = pref * (1.0 + zeta * Zf)
+    kv_Om = kv_Om[..., None]
+
+    def ssum(a, b):
+        return np.einsum('...sh,...sh->...', a, b)
+
+    K = np.empty(shape + (3, 3), dtype=complex)
+    K[..., 0, 0] = 1.0 + ssum(n * nLam_lam, PZ)
+    K[..., 0, 1] = 1j * ssum(n * dLam, PZ)
+    K[..., 1, 1] = K[..., 0, 0] - 2.0 * ssum(lam_h * dLam, PZ)
+    K[..., 0, 2] = ssum(kv_Om * nLam_lam, PW)
+    K[..., 1, 2] = 1j * ssum(kv_Om * dLam, PW)
+    K[..., 2, 2] = 1.0 + 2.0 * ssum(Lam * zeta, PW)
+    K[..., 1, 0] = -K[..., 0, 1]
+    K[..., 2, 0] = K[..., 0, 2]
+    K[..., 2, 1] = -K[..., 1, 2]
+    return K
+
+
+def hot_dielectric_tensor(f, B, ne, kpar, kperp, Z, A, frac, Te, Ti, nharm=3,
+                          nterms=24, chunk_size=1 << 16):
+    """
+    Hot Maxwellian dielectric tensor K over an arbitrary broadcast grid.
+
+    Parameters
+    ----------
+    f, B, ne : float or ndarray
+        Frequency [Hz], magnetic field [T] and electron density [m^-3].
+    kpar, kperp : float or ndarray
+        Parallel (non-zero) and perpendicular wavenumbers [m^-1]; kperp
+        may be complex.
+    Z, A, frac : see cold_plasma.stix_parameters.
+    Te, Ti : float or ndarray
+        Electron and ion temperatures [eV] (Ti is common to all ions).
+    nharm : int
+        Harmonics n = -nharm..nharm are summed.
+    nterms : int
+        Number of terms of the rational approximation of Z.
+    chunk_size : int
+        Number of grid points evaluated at once.
+
+    Returns
+    -------
+    K : complex ndarray, shape grid + (3, 3)
+        Dielectric tensor in the frame (x along k⊥, z along B).
+    """
+    coefs = _species_coefficients(Z, A)
+    shape = _grid_shape(frac, f, B, ne, kpar, kperp, Te, Ti)
+    K = np.empty(shape + (3, 3), dtype=complex)
+    Kflat = K.reshape(-1, 3, 3)
+    for sl, idx in broadcast_chunks(shape, chunk_size):
+        args = [take_chunk(x, shape, idx) for x in (f, B, ne, kpar, kperp)]
+        Kflat[sl] = _tensor(*args, take_chunk(frac, shape, idx, trailing=1),
+                            take_chunk(Te, shape, idx), take_chunk(Ti, shape, idx),
+                            coefs, nharm, nterms)
+    return K
+
+
+def _determinant(K, npar, nperp):
+    """det of the wave equation matrix n×(n×E) + K·E for n = (n⊥, 0, n∥)."""
+    M = K.copy()
+    M[..., 0, 0] -= npar**2
+    M[..., 1, 1] -= nperp**2 + npar**2
+    M[..., 2, 2] -= nperp**2
+    M[..., 0, 2] += nperp * npar
+    M[..., 2, 0] += nperp * npar
+    return np.linalg.det(M)
+
+
+def dispersion_determinant(f, B, ne, kpar, kperp, Z, A, frac, Te, Ti, nharm=3,
+                           nterms=24):
+    """Hot-plasma dispersion function det(n×n×I + K) on a broadcast grid."""
+    K = hot_dielectric_tensor(f, B, ne, kpar, kperp, Z, A, frac, Te, Ti,
+                              nharm=nharm, nterms=nterms)
+    k0 = 2.0 * np.pi * np.asarray(f) / Const.c
+    return _determinant(K, np.asarray(kpar) / k0, np.asarray(kperp) / k0)
+
+
+def solve_kperp_hot(f, B, ne, kpar, Z, A, frac, Te, Ti, kperp2_guess=None,
+                    nharm=3, nterms=24, maxiter=40, rtol=1e-10,
+                    chunk_size=1 << 16):
+    """
+    Hot-plasma k_perp^2 by a vectorized secant iteration on the determinant.
+
+    All grid points are iterated together; converged points are removed from
+    the working set, so the cost follows the slowest points only.
+
+    Parameters
+    ----------
+    f, B, ne, kpar, Z, A, frac, Te, Ti : see hot_dielectric_tensor.
+    kperp2_guess : complex ndarray, optional
+        Starting value of k_perp^2 [m^-2] (default: cold decoupled fast
+        wave (k0²R - k∥²)(k0²L - k∥²)/(k0²S - k∥²)). Use a root of
+        cold_plasma.solve_kperp2, or an IBW estimate, to follow other
+        branches.
+    maxiter : int
+        Maximum number of secant steps.
+    rtol : float
+        Relative convergence tolerance on k_perp^2.
+
+    Returns
+    -------
+    kperp2 : complex ndarray
+        Roots k_perp^2 [m^-2] with Im > 0 describing damping for k⊥ > 0.
+    converged : bool ndarray
+    """
+    coefs = _species_coefficients(Z, A)
+    shape = _grid_shape(frac, f, B, ne, kpar, Te, Ti)
+    if kperp2_guess is not None:
+        shape = np.broadcast_shapes(shape, np.shape(kperp2_guess))
+    kperp2 = np.empty(shape, dtype=complex)
+    converged = np.zeros(shape, dtype=bool)
+
+    for sl, idx in broadcast_chunks(shape, chunk_size):
+        n = sl.stop - sl.start
+        args = [np.broadcast_to(take_chunk(x, shape, idx), (n,))
+                for x in (f, B, ne, kpar, Te, Ti)]
+        frac_c = np.broadcast_to(take_chunk(frac, shape, idx, trailing=1),
+                                 (n, np.shape(frac)[-1]))
+        if kperp2_guess is None:
+            fc, Bc, nec, kparc = args[:4]
+            S, _, _, R, L = stix_parameters(fc, Bc, nec, Z, A, frac_c)
+            k02 = (2.0 * np.pi * fc / Const.c)**2
+            kpar2 = kparc**2
+            x1 = (k02 * R - kpar2) * (k02 * L - kpar2) / (k02 * S - kpar2)
+        else:
+            x1 = take_chunk(kperp2_guess, shape, idx)
+        x1 = np.broadcast_to(x1, (n,)).astype(complex)
+
+        def F(x, sel):
+            fc, Bc, nec, kparc, Tec, Tic = (a[sel] for a in args)
+            kperp = np.sqrt(x)
+            K = _tensor(fc, Bc, nec, kparc, kperp, frac_c[sel], Tec, Tic,
+                        coefs, nharm, nterms)
+            k0 = 2.0 * np.pi * fc / Const.c
+            return _determinant(K, kparc / k0, kperp / k0)
+
+        out = kperp2.reshape(-1)[sl]
+        done = converged.reshape(-1)[sl]
+        out[:] = x1
+        active = np.arange(n)
+        x0 = x1 * (1.0 + 1e-4)
+        F0 = F(x0, active)
+        F1 = F(x1, active)
+        for _ in range(maxiter):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                step = F1 * (x1 - x0) / (F1 - F0)
+            ok = np.isfinite(step)
+            step = np.where(ok, step, 0.0)
+            x0, F0 = x1, F1
+            x1 = x1 - step
+            out[active] = x1
+            ok &= np.abs(step) <= rtol * np.abs(x1)
+            done[active[ok]] = True
+            keep = ~ok
+            if not np.any(keep):
+                break
+            active, x0, x1, F0 = active[keep], x0[keep], x1[keep], F0[keep]
+            F1 = F(x1, active)
+    return kperp2, converged
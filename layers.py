@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cutoff and resonance layer locator for the cold-plasma quantities.
+
+The quantity (S, D, P, R, L or the decoupled k_perp^2 of the fast and slow
+waves, as in dispersion_relationship.py) is sampled on a coarse grid of one
+scan variable (density, field or frequency), sign changes are detected
+along that axis, and all brackets are refined together by a vectorized
+Illinois (safeguarded regula falsi) iteration to machine precision.
+
+Zeros of the quantity are cutoffs (or e.g. the S = 0 ion-ion hybrid
+resonance), while sign changes through a pole (cyclotron resonances,
+kfast2 at k0²S = k∥²) are reported with pole=True.
+
+    ne_grid = np.logspace(16, 21, 400)
+    ne_c, pole = locate_layers('kfast2', 'ne', ne_grid, Z, A, frac,
+                               f=f[:, None], B=B, kpar=kpar)
+    # ne_c[..., k]: k-th crossing (ascending), NaN padded
+
+Radii follow from a field scan with B(R) = B0 R0 / R.
+"""
+
+import numpy as np
+from ICRF_parameters import Const
+from cold_plasma import stix_parameters
+
+QUANTITIES = ('S', 'D', 'P', 'R', 'L', 'kfast2', 'kslow2')
+SCAN_VARIABLES = ('ne', 'B', 'f')
+
+
+def cold_quantity(name, f, B, ne, kpar, Z, A, frac):
+    """
+    Evaluate one of QUANTITIES on a broadcast grid.
+
+    kfast2 = ((k0²S - k∥²)² - (k0²D)²) / (k0²S - k∥²) and
+    kslow2 = P (k0²S - k∥²) / S are the decoupled branches of
+    dispersion_relationship.py.
+    """
+    if name not in QUANTITIES:
+        raise ValueError(f"Unknown quantity '{name}', expected one of {QUANTITIES}.")
+    S, D, P, R, L = stix_parameters(f, B, ne, Z, A, frac)
+    if name in ('S', 'D', 'P', 'R', 'L'):
+        return {'S': S, 'D': D, 'P': P, 'R': R, 'L': L}[name]
+    k02 = (2.0 * np.pi * np.asarray(f) / Const.c)**2
+    kpar2 = np.asarray(kpar)**2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if name == 'kfast2':
+            return (k02 * R - kpar2) * (k02 * L - kpar2) / (k02 * S - kpar2)
+        return P * (k02 * S - kpar2) / S
+
+
+def sign_changes(y, axis=-1):
+    """
+    Boolean mask of the intervals [i, i+1] along axis where y changes sign
+    (non-finite samples never bracket a crossing).
+    """
+    y = np.moveaxis(np.asarray(y), axis, -1)
+    s = np.signbit(y)
+    ok = np.isfinite(y)
+    return (s[..., 1:] != s[..., :-1]) & ok[..., 1:] & ok[..., :-1]
+
+
+def pad_crossings(shape, pidx, xc, is_pole):
+    """
+    Scatter crossings (sorted per point, C order) into NaN-padded arrays
+    of shape + (nmax,).
+    """
+    n = xc.size
+    pid = np.ravel_multi_index(pidx, shape) if shape else np.zeros(n, dtype=int)
+    rank = np.arange(n) - np.searchsorted(pid, pid)
+    nmax = int(rank.max()) + 1 if n else 0
+    x = np.full(shape + (nmax,), np.nan)
+    pole = np.zeros(shape + (nmax,), dtype=bool)
+    x[pidx + (rank,)] = xc
+    pole[pidx + (rank,)] = is_pole
+    return x, pole
+
+
+def refine_brackets(func, a, b, fa=None, fb=None, rtol=4 * np.finfo(float).eps,
+                    xtol=0.0, maxiter=200):
+    """
+    Refine many independent brackets [a, b] (func(a)·func(b) < 0) at once.
+
+    Parameters
+    ----------
+    func : callable
+        func(x, sel) -> values at x for the brackets of index sel
+        (both 1D arrays of the same length).
+    a, b : 1D ndarray
+        Bracket ends.
+    fa, fb : 1D ndarray, optional
+        func(a), func(b) if already known.
+    rtol, xtol : float
+        Convergence when |b - a| <= rtol |x| + xtol.
+    maxiter : int
+        Maximum number of iterations.
+
+    Returns
+    -------
+    x : 1D ndarray
+        Crossing positions.
+    """
+    a = np.array(a, dtype=float)
+    b = np.array(b, dtype=float)
+    sel = np.arange(a.size)
+    # brackets around a pole are expected, their ends may be inf or nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fa = func(a, sel) if fa is None else np.array(fa, dtype=float)
+        fb = func(b, sel) if fb is None else np.array(fb, dtype=float)
+    x = 0.5 * (a + b)
+    width = np.abs(b - a)
+    bisect = np.zeros(a.size, dtype=bool)
+
+    for _ in range(maxiter):
+        done = np.abs(b - a) <= rtol * np.abs(x[sel]) + xtol
+        if np.all(done):
+            break
+        keep = ~done
+        sel, a, b, fa, fb, width, bisect = (v[keep] for v in
+                                            (sel, a, b, fa, fb, width, bisect))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            c = b - fb * (b - a) / (fb - fa)
+            lo, hi = np.minimum(a, b), np.maximum(a, b)
+            bisect |= ~((c > lo) & (c < hi))
+            c = np.where(bisect, 0.5 * (a + b), c)
+            fc = func(c, sel)
+
+        flip = np.signbit(fc) != np.signbit(fb)
+        fa = np.where(flip, fb, 0.5 * fa)       # Illinois modification
+        a = np.where(flip, b, a)
+        b, fb = c, fc
+        # fall back to bisection when the bracket does not shrink enough
+        new_width = np.abs(b - a)
+        bisect = new_width > 0.5 * width
+        width = new_width
+        x[sel] = c
+        a = np.where(fc == 0, c, a)
+    return x
+
+
+def locate_layers(quantity, var, grid, Z, A, frac, f=None, B=None, ne=None,
+                  kpar=0.0, rtol=4 * np.finfo(float).eps, maxiter=200):
+    """
+    Crossings of a cold-plasma quantity along one scan variable.
+
+    Parameters
+    ----------
+    quantity : str
+        One of QUANTITIES.
+    var : str
+        Scanned variable, 'ne', 'B' or 'f'.
+    grid : 1D ndarray
+        Coarse samples of the scanned variable, used to bracket the
+        crossings (all crossings between two samples must be isolated).
+    Z, A, frac : see cold_plasma.stix_parameters.
+    f, B, ne, kpar : float or ndarray
+        The other parameters, broadcast together with frac[..., 0]; the one
+        named by var is ignored.
+
+    Returns
+    -------
+    x : ndarray, shape params + (nmax,)
+        Crossing values of the scanned variable, ascending along the grid,
+        padded with NaN (nmax is the largest number of crossings).
+    pole : bool ndarray, same shape
+        True where the sign change is a pole (resonance) and not a zero.
+    """
+    if var not in SCAN_VARIABLES:
+        raise ValueError(f"Unknown scan variable '{var}', expected one of {SCAN_VARIABLES}.")
+    grid = np.asarray(grid, dtype=float)
+    frac = np.asarray(frac, dtype=float)
+    params = {'f': f, 'B': B, 'ne': ne, 'kpar': kpar}
+    params[var] = 1.0
+    params = {k: np.asarray(v, dtype=float) for k, v in params.items()}
+    shape = np.broadcast_shapes(frac.shape[:-1], *(v.shape for v in params.values()))
+
+    # coarse samples, scan axis last
+    coarse = {k: v[..., None] for k, v in params.items()}
+    coarse[var] = grid
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = cold_quantity(quantity, coarse['f'], coarse['B'], coarse['ne'],
+                          coarse['kpar'], Z, A, frac[..., None, :])
+    y = np.broadcast_to(y, shape + grid.shape)
+    brackets = sign_changes(y)
+    *pidx, i = np.nonzero(brackets)
+    pidx = tuple(pidx)
+
+    point = {k: np.broadcast_to(np.broadcast_to(v, shape)[pidx], i.shape)
+             for k, v in params.items()}
+    frac_b = np.broadcast_to(np.broadcast_to(frac, shape + frac.shape[-1:])[pidx],
+                             i.shape + frac.shape[-1:])
+
+    def func(x, sel):
+        p = {k: v[sel] for k, v in point.items()}
+        p[var] = x
+        return cold_quantity(quantity, p['f'], p['B'], p['ne'], p['kpar'],
+                             Z, A, frac_b[sel])
+
+    fa, fb = y[pidx + (i,)], y[pidx + (i + 1,)]
+    xc = refine_brackets(func, grid[i], grid[i + 1], fa, fb, rtol=rtol,
+                         maxiter=maxiter)
+    # pole crossings are classified below, not warned about
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fc = np.abs(func(xc, np.arange(xc.size)))
+    is_pole = ~(fc <= np.maximum(np.abs(fa), np.abs(fb)))
+
+    return pad_crossings(shape, pidx, xc, is_pole)
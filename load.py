@@ -6,6 +6,8 @@ Created on Thu Feb 27 09:40:00 2025
 @author: YJ281217
 """
 
+import json
+import re
 import numpy as np
 
 def fun_load_touchstone(fname):
@@ -24,6 +26,13 @@ def fun_load_touchstone(fname):
           1D array of frequency points (in Hz, after applying unit scaling).
       S : list of numpy.ndarray
           List of scattering matrices. Each matrix is of shape (nports, nports).
+
+    Warning:
+      The matrices are transposed for nports >= 3: touchstone stores the
+      rows S_11 S_12 S_13 ..., but every matrix is read in the 2-port
+      order (S_11 S_21 S_12 S_22), so S[k][i, j] holds S_(j+1)(i+1). This
+      is harmless only for reciprocal (symmetric) S; load_touchstone
+      returns the matrices in the file order.
     """
 
     try:
@@ -94,4 +103,398 @@ def fun_load_touchstone(fname):
         S_matrix = np.reshape(Xtmp, (nports, nports)).T
         S_matrices.append(S_matrix)
 
-    return np.array(freq_points), S_matrices
\ No newline at end of file
+    return np.array(freq_points), S_matrices
+
+
+_UNIT_MAPPING = {'HZ': 1.0, 'KHZ': 1e3, 'MHZ': 1e6, 'GHZ': 1e9, 'THZ': 1e12}
+_FORMATS = ('MA', 'RI', 'DB')
+
+
+def _read_header(fh, fname=''):
+    """
+    Read the header of an open touchstone file up to the first data line.
+
+    The option line ``# <unit> S <format> R <z0>`` is parsed according to the
+    Touchstone specification (tokens in any order, case insensitive, with
+    the defaults GHz, S, MA and 50 Ohm). Version 2 keywords
+    ``[Number of Ports]`` and ``[Two-Port Data Order]`` are honoured, otherwise
+    the number of ports is taken from the ``.sNp`` file extension.
+
+    Returns:
+      header : dict
+          Keys 'unit', 'format', 'z0', 'nports' and 'order_21'.
+      pos : int
+          File offset of the first data line.
+    """
+    header = {'unit': 1e9, 'format': 'MA', 'z0': 50.0,
+              'nports': None, 'order_21': None}
+    option_found = False
+    while True:
+        pos = fh.tell()
+        line = fh.readline()
+        if not line:
+            break
+        line = line.split('!', 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            if option_found:
+                continue  # only the first option line is significant
+            option_found = True
+            tokens = line[1:].upper().split()
+            i = 0
+            while i < len(tokens):
+                tok = tokens[i]
+                if tok in _UNIT_MAPPING:
+                    header['unit'] = _UNIT_MAPPING[tok]
+                elif tok in _FORMATS:
+                    header['format'] = tok
+                elif tok == 'R':
+                    try:
+                        header['z0'] = float(tokens[i + 1])
+                    except (IndexError, ValueError) as e:
+                        raise ValueError("Error: wrong reference impedance.") from e
+                    i += 1
+                elif tok != 'S':
+                    raise ValueError(f"Error: unsupported option '{tok}', "
+                                     "only S-parameters are handled.")
+                i += 1
+        elif line.startswith('['):
+            keyword, _, value = line[1:].partition(']')
+            keyword = keyword.strip().lower()
+            value = value.strip()
+            if keyword == 'number of ports':
+                header['nports'] = int(value)
+            elif keyword == 'two-port data order':
+                header['order_21'] = (value == '21_12')
+            elif keyword == 'matrix format' and value.lower() != 'full':
+                raise ValueError("Error: only full matrix format is supported.")
+            elif keyword == 'network data':
+                pos = fh.tell()
+                break
+        else:
+            break
+
+    if not option_found:
+        raise ValueError("No header line (starting with '#') found in file.")
+
+    if header['nports'] is None:
+        m = re.search(r'\.s(\d+)p$', str(fname), re.IGNORECASE)
+        if m is None:
+            raise ValueError("Cannot determine number of ports from filename.")
+        header['nports'] = int(m.group(1))
+    if header['order_21'] is None:
+        # Touchstone v1 stores 2-port data column-wise (S11 S21 S12 S22)
+        header['order_21'] = header['nports'] == 2
+    return header, pos
+
+
+def _strip_data(text):
+    """
+    Remove comments and trailing keyword sections from a data block.
+
+    Returns the numeric text and whether a keyword closing the network
+    data (e.g. ``[Noise Data]`` or ``[End]``) was found.
+    """
+    if '!' in text:
+        text = re.sub(r'!.*', '', text)
+    end = text.find('[')
+    if end >= 0:
+        return text[:end], True
+    return text, False
+
+
+def _records_to_S(records, header):
+    """
+    Convert raw records of shape (nfreq, 1 + 2*nports**2) into the frequency
+    array in Hz and the stacked complex S-matrices (nfreq, nports, nports).
+    """
+    nports = header['nports']
+    f = records[:, 0] * header['unit']
+    a = records[:, 1::2]
+    b = records[:, 2::2]
+    fmt = header['format']
+    if fmt == 'RI':
+        X = a + 1j * b
+    else:
+        if fmt == 'DB':
+            a = 10.0 ** (a / 20.0)
+        X = a * np.exp(1j * np.deg2rad(b))
+    S = X.reshape(-1, nports, nports)
+    if header['order_21']:
+        S = S.transpose(0, 2, 1)
+    return f, np.ascontiguousarray(S)
+
+
+def load_touchstone(fname):
+    """
+    Load a touchstone file (v1 or v2) into one stacked complex array.
+
+    The numeric block is converted in a single pass, so the cost does not
+    depend on a Python loop over the frequency points. MA, RI and DB formats,
+    Hz/kHz/MHz/GHz/THz units and any number of ports are handled.
+
+    Parameters:
+      fname : str
+          Name of the touchstone file. The number of ports is read from the
+          ``[Number of Ports]`` keyword (v2) or the ``.sNp`` extension (v1).
+          A ``.npz`` container written by save_network is read as well.
+
+    Returns:
+      f : numpy.ndarray
+          1D array of frequency points in Hz.
+      S : numpy.ndarray
+          Complex array of shape (nfreq, nports, nports); ``S[:, i, j]`` is
+          a view on S_(i+1)(j+1) over frequency.
+      z0 : float
+          Reference impedance in Ohm.
+
+    Note:
+      For three or more ports this is the transpose of the matrices of
+      fun_load_touchstone, which swaps S_ij and S_ji. Scripts that move
+      from fun_load_touchstone to this reader see S[:, i, j] and
+      S[:, j, i] exchanged for non-reciprocal S; 1- and 2-port files
+      give the same matrices.
+    """
+    if str(fname).lower().endswith('.npz'):
+        f, S, z0, _ = load_network(fname)
+        return f, S, z0
+
+    with open(fname, 'r') as fh:
+        header, pos = _read_header(fh, fname)
+        fh.seek(pos)
+        text = fh.read()
+
+    text, _ = _strip_data(text)
+    data = np.fromstring(text, sep=' ')
+    if data.size == 0:
+        raise ValueError("No numeric data found in file.")
+
+    record = 1 + 2 * header['nports'] ** 2
+    if data.size % record:
+        raise ValueError(f"Number of values ({data.size}) is not a multiple "
+                         f"of the record length ({record}).")
+    f, S = _records_to_S(data.reshape(-1, record), header)
+    return f, S, header['z0']
+
+
+def iter_touchstone(fname, block_size=4096, read_bytes=1 << 22):
+    """
+    Read a touchstone file by blocks of frequency points.
+
+    Only one block of text and one block of S-matrices are held in memory
+    at a time, so reductions over very long sweeps run with bounded memory:
+
+        smax = 0.0
+        for f, S in iter_touchstone(fname):
+            smax = max(smax, np.abs(S[:, 0, 0]).max())
+
+    Parameters:
+      fname : str
+          Name of the touchstone file (same conventions as load_touchstone).
+      block_size : int
+          Number of frequency points per block (the last one can be shorter).
+      read_bytes : int
+          Approximate size of the text read from the file at once.
+
+    Yields:
+      f : numpy.ndarray
+          Frequency points of the block in Hz, shape (n,).
+      S : numpy.ndarray
+          Complex S-matrices of the block, shape (n, nports, nports).
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be positive.")
+
+    with open(fname, 'r') as fh:
+        header, pos = _read_header(fh, fname)
+        fh.seek(pos)
+        record = 1 + 2 * header['nports'] ** 2
+        block_values = block_size * record
+        pending = np.empty(0)
+        done = False
+        while not done:
+            lines = fh.readlines(read_bytes)
+            done = not lines
+            if lines:
+                text, done = _strip_data(''.join(lines))
+                values = np.fromstring(text, sep=' ')
+                pending = np.concatenate((pending, values)) if pending.size else values
+            nblocks = pending.size // block_values
+            for k in range(nblocks):
+                chunk = pending[k * block_values:(k + 1) * block_values]
+                yield _records_to_S(chunk.reshape(block_size, record), header)
+            pending = pending[nblocks * block_values:]
+
+        if pending.size % record:
+            raise ValueError(f"Number of values is not a multiple of the "
+                             f"record length ({record}).")
+        if pending.size:
+            yield _records_to_S(pending.reshape(-1, record), header)
+
+
+# smallest magnitude written in DB format, -inf is not a touchstone number
+_DB_FLOOR = 1e-30
+
+
+def _touchstone_values(f, S, fmt, unit, order_21):
+    """Records of shape (nfreq, 1 + 2*nports**2) in file order and format."""
+    if order_21:
+        S = S.transpose(0, 2, 1)
+    X = S.reshape(S.shape[0], -1)
+    if fmt == 'RI':
+        a, b = X.real, X.imag
+    else:
+        a = np.abs(X)
+        if fmt == 'DB':
+            # exact zeros (ideal match, isolation) give -600 dB, not -inf
+            a = 20.0 * np.log10(np.maximum(a, _DB_FLOOR))
+        b = np.rad2deg(np.angle(X))
+    values = np.empty((X.shape[0], 1 + 2 * X.shape[1]))
+    values[:, 0] = f / _UNIT_MAPPING[unit]
+    values[:, 1::2] = a
+    values[:, 2::2] = b
+    return values
+
+
+def _record_format(nports, precision):
+    """
+    printf format of one frequency record: all pairs on one line up to 2
+    ports, otherwise one line per matrix row with at most 4 pairs per line.
+    """
+    num = f'% .{precision}e'
+    pair = f'{num} {num}'
+    if nports <= 2:
+        return ' '.join([num] + [pair] * nports**2) + '\n'
+    rows = []
+    for _ in range(nports):
+        lines = [' '.join([pair] * min(4, nports - k)) for k in range(0, nports, 4)]
+        rows.append('\n'.join(lines))
+    return num + ' ' + '\n'.join(rows) + '\n'
+
+
+def write_touchstone(fname, f, S, z0=50.0, fmt='RI', unit='HZ', version=1,
+                     precision=9, comments=None, block_size=4096):
+    """
+    Write stacked S-matrices to a touchstone file (v1 or v2).
+
+    The records are converted to the output format in one pass and each
+    block of frequency points is formatted with a single printf-style
+    operation, so the cost does not depend on a Python loop over the
+    matrix elements. The file is read back by load_touchstone.
+
+    Parameters:
+      fname : str
+          Output file; a version 1 file must end in ``.sNp`` (N = nports).
+      f : numpy.ndarray
+          Frequency points in Hz, shape (nfreq,).
+      S : numpy.ndarray
+          Complex array of shape (nfreq, nports, nports).
+      z0 : float
+          Reference impedance in Ohm.
+      fmt : str
+          'RI', 'MA' or 'DB' (angles in degrees). In DB, magnitudes below
+          1e-30 (e.g. exact zeros) are written as -600 dB.
+      unit : str
+          Frequency unit of the file: 'HZ', 'KHZ', 'MHZ', 'GHZ' or 'THZ'.
+      version : int
+          1 or 2 (v2 writes the [Number of Ports], [Two-Port Data Order],
+          [Number of Frequencies] and [Network Data] keywords).
+      precision : int
+          Number of mantissa digits after the decimal point of the
+          exponential notation ('%.{precision}e'), i.e. precision + 1
+          significant digits.
+      comments : str or list of str, optional
+          Comment lines written at the top (without the leading '!').
+      block_size : int
+          Number of frequency points formatted at once.
+    """
+    f = np.asarray(f, dtype=float)
+    S = np.asarray(S)
+    fmt, unit = fmt.upper(), unit.upper()
+    if S.ndim != 3 or S.shape[1] != S.shape[2] or S.shape[0] != f.size:
+        raise ValueError("S must be of shape (nfreq, nports, nports) with nfreq = f.size.")
+    if fmt not in _FORMATS or unit not in _UNIT_MAPPING:
+        raise ValueError(f"Unsupported format '{fmt}' or unit '{unit}'.")
+    if version not in (1, 2):
+        raise ValueError("version must be 1 or 2.")
+    nports = S.shape[1]
+    if version == 1 and not re.search(rf'\.s{nports}p$', str(fname), re.IGNORECASE):
+        raise ValueError(f"A version 1 file must have the extension .s{nports}p.")
+
+    if isinstance(comments, str):
+        comments = comments.splitlines()
+    lines = [f'! {c}' for c in (comments or [])]
+    if version == 2:
+        lines.append('[Version] 2.0')
+    name = {'HZ': 'Hz', 'KHZ': 'kHz', 'MHZ': 'MHz', 'GHZ': 'GHz', 'THZ': 'THz'}[unit]
+    lines.append(f'# {name} S {fmt} R {z0:g}')
+    if version == 2:
+        lines.append(f'[Number of Ports] {nports}')
+        if nports == 2:
+            lines.append('[Two-Port Data Order] 21_12')
+        lines.append(f'[Number of Frequencies] {f.size}')
+        lines.append('[Network Data]')
+
+    values = _touchstone_values(f, S, fmt, unit, nports == 2)
+    record = _record_format(nports, precision)
+    with open(fname, 'w') as fh:
+        fh.write('\n'.join(lines) + '\n')
+        for start in range(0, f.size, block_size):
+            block = values[start:start + block_size]
+            fh.write((record * block.shape[0]) % tuple(block.ravel().tolist()))
+        if version == 2:
+            fh.write('[End]\n')
+
+
+def save_network(fname, f, S, z0=50.0, dtype=np.complex128, metadata=None):
+    """
+    Write S-parameters to a binary ``.npz`` container.
+
+    Much faster to write and read than touchstone text, for example to
+    export the results of a scan; load_touchstone and load_network read it
+    back.
+
+    Parameters:
+      fname : str
+          Output file (``.npz`` is appended by numpy if missing).
+      f : numpy.ndarray
+          Frequency points in Hz, shape (nfreq,).
+      S : numpy.ndarray
+          Complex array of shape (..., nfreq, nports, nports); leading axes
+          store a batch of networks (e.g. one per scan point).
+      z0 : float
+          Reference impedance in Ohm.
+      dtype : numpy dtype
+          Storage precision, complex64 or complex128.
+      metadata : dict, optional
+          JSON-serializable information stored with the data (e.g. scan
+          parameters).
+    """
+    f = np.asarray(f, dtype=float)
+    S = np.asarray(S)
+    if S.ndim < 3 or S.shape[-1] != S.shape[-2] or S.shape[-3] != f.size:
+        raise ValueError("S must be of shape (..., nfreq, nports, nports) with nfreq = f.size.")
+    if np.dtype(dtype) not in (np.complex64, np.complex128):
+        raise ValueError("dtype must be complex64 or complex128.")
+    np.savez(fname, f=f, S=S.astype(dtype, copy=False), z0=np.float64(z0),
+             metadata=np.array(json.dumps(metadata or {})))
+
+
+def load_network(fname):
+    """
+    Read a container written by save_network.
+
+    Returns:
+      f : numpy.ndarray
+          Frequency points in Hz.
+      S : numpy.ndarray
+          Complex array of shape (..., nfreq, nports, nports), in the
+          stored precision.
+      z0 : float
+          Reference impedance in Ohm.
+      metadata : dict
+    """
+    with np.load(fname) as data:
+        return (data['f'], data['S'], float(data['z0']),
+                json.loads(str(data['metadata'])))
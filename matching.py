@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Matching-network settings for batches of load reflection coefficients.
+
+The plasma load of a strap changes on millisecond time scales; lookup
+tables of matching settings are precomputed here for many loads Γ_L at
+once (e.g. 1e5 measured samples, or the S[:, 0, 0] traces returned by
+load_touchstone as plotted by smith_Smatrix), and every result is checked by evaluating
+the matched circuit with network.py:
+
+  - single_stub_match : shunt stub at a distance d from the load (analytic)
+  - double_stub_match : stubs at the load and at a fixed spacing (analytic)
+  - two_capacitor_match : shunt C2 - line - series C1 - load, solved by a
+    vectorized damped Newton iteration (newton_match) for any circuit
+    given as a function of its element values
+
+    gamma = S[:, 0, 0]                            # (nf,) or measured samples
+    tab = single_stub_match(gamma, f=48e6, z0=50)
+    tab['d'], tab['l'], tab['vswr']               # (n, 2): both solutions
+
+Lengths are in metres, lines and stubs have the characteristic impedance
+z0 of the feeder and the velocity factor vf.
+"""
+
+import numpy as np
+from ICRF_parameters import Const
+from network import (cascade, capacitor_impedance, series, shunt,
+                     stub_admittance, terminate, transmission_line)
+
+
+def vswr(gamma):
+    """Voltage standing-wave ratio (1 + |Γ|) / (1 - |Γ|), inf for |Γ| >= 1 (NaN kept)."""
+    g = np.abs(gamma)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(g < 1, (1 + g) / (1 - g), np.where(np.isnan(g), np.nan, np.inf))
+
+
+def _wavelength(f, vf):
+    return vf * Const.c / np.asarray(f, dtype=float)
+
+
+def _stub_length(b, lam, end):
+    """Stub length [m] of normalized susceptance b (short: -cot βl, open: tan βl)."""
+    if end == 'short':
+        x = np.arctan2(-1.0, b)
+    elif end == 'open':
+        x = np.arctan(b)
+    else:
+        raise ValueError("end must be 'short' or 'open'.")
+    return np.mod(x, np.pi) / (2 * np.pi) * lam
+
+
+def _gamma_in(chain, gamma_L):
+    """Input reflection coefficient of a 2-port chain terminated by gamma_L."""
+    return terminate(chain, [1], np.asarray(gamma_L)[..., None])[..., 0, 0]
+
+
+def single_stub_match(gamma, f, z0=50.0, vf=1.0, end='short'):
+    """
+    Shunt-stub tuner: line of length d from the load, then a stub of
+    length l (Pozar, Microwave Engineering, sec. 5.2).
+
+    Parameters:
+      gamma : complex or numpy.ndarray
+          Load reflection coefficients (reference z0).
+      f : float or numpy.ndarray
+          Frequency [Hz], broadcast with gamma.
+      z0 : float
+          Characteristic impedance of the line and stub [Ohm].
+      vf : float
+          Velocity factor.
+      end : str
+          'short' or 'open' stub.
+
+    Returns:
+      out : dict
+          'd', 'l' [m] (shortest positive lengths) and 'vswr' of the matched
+          circuit, shape broadcast(gamma, f) + (2,) for the two solutions;
+          NaN for active or lossless-reactive loads (|Γ_L| >= 1).
+    """
+    gamma = np.asarray(gamma, dtype=complex)
+    shape = np.broadcast_shapes(gamma.shape, np.shape(f))
+    lam = np.broadcast_to(_wavelength(f, vf), shape)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Z = z0 * (1 + gamma) / (1 - gamma)
+        R, X = np.broadcast_to(Z.real, shape)[..., None], np.broadcast_to(Z.imag, shape)[..., None]
+        # roots of (R - z0) t² - 2 X t + (R (z0 - R) - X²) / z0 = 0 (t = tan βd)
+        # without cancellation; t1 is infinite (d = λ/4) when R == z0
+        q = np.copysign(np.sqrt(R * ((z0 - R)**2 + X**2) / z0), X)
+        t1 = np.where(R == z0, np.inf, (X + q) / (R - z0))
+        t2 = np.where(X + q == 0, 0.0, (R * (z0 - R) - X**2) / (z0 * (X + q)))
+        t = np.where(X >= 0, np.concatenate([t1, t2], axis=-1), np.concatenate([t2, t1], axis=-1))
+        t = np.where(R > 0, t, np.nan)
+        B = np.where(np.isinf(t), X / z0**2,
+                     (R**2 * t - (z0 - X * t) * (X + z0 * t)) / (z0 * (R**2 + (X + z0 * t)**2)))
+    d = np.mod(np.arctan(t), np.pi) / (2 * np.pi) * lam
+    l = _stub_length(-B * z0, lam, end)          # stub cancels B
+    fb = np.asarray(f)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):      # NaN lengths
+        chain = cascade(shunt(stub_admittance(fb, l, z0, end, vf), z0),
+                        transmission_line(fb, d, z0, z0, vf))
+        g_in = _gamma_in(chain, gamma[..., None])
+    return {'d': d, 'l': l, 'vswr': vswr(g_in)}
+
+
+def double_stub_match(gamma, f, spacing, z0=50.0, vf=1.0, end='short'):
+    """
+    Double-stub tuner: stub 1 at the load, stub 2 a fixed spacing towards
+    the generator (Pozar, sec. 5.3).
+
+    Parameters:
+      gamma, f, z0, vf, end :
+          See single_stub_match.
+      spacing : float
+          Distance between the stubs [m] (λ/8 or 3λ/8 are usual).
+
+    Returns:
+      out : dict
+          'l1', 'l2' [m] and 'vswr', shape broadcast(gamma, f) + (2,); NaN
+          where the load admittance is in the forbidden region
+          g > (1 + t²) / t², t = tan(β spacing).
+    """
+    gamma = np.asarray(gamma, dtype=complex)
+    shape = np.broadcast_shapes(gamma.shape, np.shape(f))
+    lam = np.broadcast_to(_wavelength(f, vf), shape)[..., None]
+    t = np.tan(2 * np.pi * spacing / lam)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.broadcast_to((1 - gamma) / (1 + gamma), shape)[..., None]
+        g, b = y.real, y.imag
+        root = np.sqrt((1 + t**2) * g - g**2 * t**2) * np.array([1.0, -1.0])
+        b1 = -b + (1 + root) / t
+        b2 = (root + g) / (g * t)
+    l1 = _stub_length(b1, lam, end)
+    l2 = _stub_length(b2, lam, end)
+    fb = np.asarray(f)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):      # forbidden region
+        chain = cascade(shunt(stub_admittance(fb, l2, z0, end, vf), z0),
+                        transmission_line(fb, spacing, z0, z0, vf),
+                        shunt(stub_admittance(fb, l1, z0, end, vf), z0))
+        g_in = _gamma_in(chain, gamma[..., None])
+    return {'l1': l1, 'l2': l2, 'vswr': vswr(g_in)}
+
+
+def newton_match(circuit, x0, bounds=None, tol=1e-10, maxiter=50, step=1e-7):
+    """
+    Solve Γ_in(x) = 0 for two real element parameters at many points at once.
+
+    Only the points that have not converged are iterated, as in
+    layers.refine_brackets.
+
+    Parameters:
+      circuit : callable
+          circuit(x, sel) -> complex Γ_in of shape (len(sel),) for the
+          parameters x, shape (len(sel), 2), of the points of flat index sel.
+      x0 : numpy.ndarray
+          Starting points, shape (..., 2).
+      bounds : (array_like, array_like), optional
+          Lower and upper bounds of the two parameters; steps are clipped.
+      tol : float
+          Convergence when |Γ_in| <= tol.
+      maxiter : int
+          Maximum number of Newton iterations.
+      step : float
+          Relative finite-difference step of the Jacobian.
+
+    Returns:
+      x : numpy.ndarray
+          Parameters, shape (..., 2).
+      gamma_in : numpy.ndarray
+          Residual input reflection coefficients, shape x0.shape[:-1].
+      converged : numpy.ndarray of bool
+    """
+    x0 = np.asarray(x0, dtype=float)
+    lo, hi = (-np.inf, np.inf) if bounds is None else (np.asarray(b, dtype=float) for b in bounds)
+    x = np.clip(x0.reshape(-1, 2), lo, hi)
+    sel = np.arange(x.shape[0])
+    r = circuit(x, sel)
+    for _ in range(maxiter):
+        sel = sel[~(np.abs(r[sel]) <= tol)]
+        if sel.size == 0:
+            break
+        xs, rs = x[sel], r[sel]
+        # Jacobian of (Re, Im) Γ_in by forward differences
+        h = step * (1.0 + np.abs(xs))
+        J = np.empty((sel.size, 2, 2))
+        for k in range(2):
+            xk = xs.copy()
+            xk[:, k] += h[:, k]
+            dr = (circuit(xk, sel) - rs) / h[:, k]
+            J[:, 0, k], J[:, 1, k] = dr.real, dr.imag
+        det = J[:, 0, 0] * J[:, 1, 1] - J[:, 0, 1] * J[:, 1, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dx = -np.stack([J[:, 1, 1] * rs.real - J[:, 0, 1] * rs.imag,
+                            J[:, 0, 0] * rs.imag - J[:, 1, 0] * rs.real], axis=-1) / det[:, None]
+        dx = np.where(np.isfinite(dx), dx, 0.0)
+        # halve the step where it does not reduce |Γ_in|
+        scale = np.ones(sel.size)
+        for _ in range(8):
+            x_new = np.clip(xs + scale[:, None] * dx, lo, hi)
+            r_new = circuit(x_new, sel)
+            worse = ~(np.abs(r_new) < np.abs(rs))
+            if not worse.any():
+                break
+            scale = np.where(worse, 0.5 * scale, scale)
+        better = np.abs(r_new) < np.abs(rs)
+        x[sel[better]] = x_new[better]
+        r[sel[better]] = r_new[better]
+        # points that no longer improve (unreachable loads) are left as they are
+        sel = sel[np.abs(r_new) < (1.0 - 1e-6) * np.abs(rs)]
+    return x.reshape(x0.shape), r.reshape(x0.shape[:-1]), np.abs(r.reshape(x0.shape[:-1])) <= tol
+
+
+def two_capacitor_match(gamma, f, length, z0=50.0, z_line=None, vf=1.0,
+                        C0=((100e-12, 100e-12), (30e-12, 300e-12), (300e-12, 30e-12)),
+                        C_bounds=(1e-12, 1e-8), tol=1e-10, maxiter=50):
+    """
+    Capacitor values of a shunt C2 - line - series C1 - load network.
+
+    Newton iterations on (ln C1, ln C2) are run from every start of C0 for
+    all loads at once, and the best result per load is kept.
+
+    Parameters:
+      gamma, f, z0, vf :
+          See single_stub_match.
+      length : float
+          Length of the line between the capacitors [m].
+      z_line : float, optional
+          Characteristic impedance of that line (default z0).
+      C0 : sequence of (C1, C2)
+          Starting values [F].
+      C_bounds : (float, float)
+          Range of both capacitors [F].
+      tol, maxiter :
+          See newton_match.
+
+    Returns:
+      out : dict
+          'C1', 'C2' [F], 'vswr' and 'converged', shape broadcast(gamma, f).
+    """
+    z_line = z0 if z_line is None else z_line
+    gamma = np.asarray(gamma, dtype=complex)
+    shape = np.broadcast_shapes(gamma.shape, np.shape(f))
+    nstart = len(C0)
+    gL = np.broadcast_to(gamma, shape)[..., None].repeat(nstart, axis=-1).reshape(-1)
+    fb = np.broadcast_to(np.asarray(f, dtype=float), shape)[..., None].repeat(nstart, axis=-1).reshape(-1)
+
+    def circuit(x, sel):
+        C1, C2 = np.exp(x[:, 0]), np.exp(x[:, 1])
+        fs = fb[sel]
+        chain = cascade(shunt(1.0 / capacitor_impedance(fs, C2), z0),
+                        transmission_line(fs, length, z_line, z0, vf),
+                        series(capacitor_impedance(fs, C1), z0))
+        return _gamma_in(chain, gL[sel])
+
+    x0 = np.broadcast_to(np.log(np.asarray(C0, dtype=float)), shape + (nstart, 2))
+    bounds = np.log(C_bounds)
+    x, r, ok = newton_match(circuit, x0, bounds=(bounds[[0, 0]], bounds[[1, 1]]),
+                            tol=tol, maxiter=maxiter)
+    best = np.argmin(np.where(np.isfinite(r), np.abs(r), np.inf), axis=-1)[..., None]
+    x = np.take_along_axis(x, best[..., None], axis=-2)[..., 0, :]
+    r = np.take_along_axis(r, best, axis=-1)[..., 0]
+    return {'C1': np.exp(x[..., 0]), 'C2': np.exp(x[..., 1]), 'vswr': vswr(r),
+            'converged': np.take_along_axis(ok, best, axis=-1)[..., 0]}
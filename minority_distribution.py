@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Steady-state Stix distribution of an ICRF-heated minority.
+
+Balancing quasi-linear diffusion against collisional drag on electrons and
+bulk ions gives the isotropic steady state (Stix 1975)
+
+    -d ln f / dE = (1 + (Ec/E)^(3/2)) / (Te (1 + xi) + Ti (Ec/E)^(3/2)),
+
+with Ec the critical energy (critical_energy.py) and xi = P tau_s / (3 n_min Te)
+(tail_scan.py): the minority is Maxwellian at Ti at low energy and has a
+tail of temperature Te (1 + xi) above Ec. ln f is obtained by cumulative
+trapezoidal integration along an energy grid for every scan point at once:
+
+    E = np.linspace(0, 2000, 801)                          # keV
+    F, Ec, xi = minority_distribution(E, P[:, None], conc, Te, Ti, ne,
+                                      Z=1, A=1, Z_bulk=[1], A_bulk=[2],
+                                      frac_bulk=[1.0])
+    mean_E, tail, p_i, p_e = distribution_moments(E, F, Ec, E_tail=100)
+
+minority_moments returns the moments of a whole scan chunk by chunk without
+keeping the distributions in memory.
+
+Energies and temperatures are in keV.
+"""
+
+import numpy as np
+from critical_energy import critical_energy
+from tail_scan import tail_parameters
+
+
+def _cumtrapz(y, x):
+    """Cumulative trapezoidal integral of y along the last axis, from x[0]."""
+    dx = np.diff(x, axis=-1)
+    area = 0.5 * dx * (y[..., 1:] + y[..., :-1])
+    out = np.zeros(np.broadcast_shapes(y.shape, x.shape))
+    np.cumsum(area, axis=-1, out=out[..., 1:])
+    return out
+
+
+def _trapz(y, x):
+    return np.sum(0.5 * np.diff(x, axis=-1) * (y[..., 1:] + y[..., :-1]), axis=-1)
+
+
+def stix_distribution(E, Te, Ti, xi, Ec):
+    """
+    Normalized energy distribution F(E) of the Stix steady state.
+
+    Parameters
+    ----------
+    E : 1D ndarray
+        Energy grid [keV], ascending, starting at (or near) 0.
+    Te, Ti, xi, Ec : float or ndarray
+        Electron and ion temperatures [keV], Stix parameter and critical
+        energy [keV]; broadcast together (scan shape).
+
+    Returns
+    -------
+    F : ndarray, shape scan + (nE,)
+        Energy distribution sqrt(E) f(E), normalized to ∫ F dE = 1.
+    """
+    E = np.asarray(E, dtype=float)
+    Te, Ti, xi, Ec = (np.asarray(v, dtype=float)[..., None] for v in (Te, Ti, xi, Ec))
+    # integrand multiplied by (E/Ec)^1.5 above and below: regular at E = 0
+    u = E**1.5 * Ec**-1.5
+    g = (u + 1.0) / (Te * (1.0 + xi) * u + Ti)
+    F = np.sqrt(E) * np.exp(-_cumtrapz(g, E))
+    return F / _trapz(F, E)[..., None]
+
+
+def _scan(E, P, conc, Te, Ti, ne, Z, A, Z_bulk, A_bulk, frac_bulk, chunk_size):
+    """
+    Yield (scan shape, flat slice, F, Ec, xi) for chunks of the scan; xi
+    and Ec are cheap and evaluated on the whole scan at once.
+    """
+    _, xi, _ = tail_parameters(Te, ne, P, conc, Z, A)
+    Ec = critical_energy(np.asarray(Te, dtype=float) * 1e3, Z_bulk, A_bulk,
+                         frac_bulk, A) / 1e3
+    shape = np.broadcast_shapes(np.shape(xi), np.shape(Ec), np.shape(Ti))
+    Te, Ti, xi, Ec = (np.broadcast_to(v, shape).reshape(-1) for v in (Te, Ti, xi, Ec))
+    npts = max(1, chunk_size // max(1, np.size(E)))
+    for start in range(0, Te.size, npts):
+        sl = slice(start, min(start + npts, Te.size))
+        yield shape, sl, stix_distribution(E, Te[sl], Ti[sl], xi[sl], Ec[sl]), Ec[sl], xi[sl]
+
+
+def minority_distribution(E, P, conc, Te, Ti, ne, Z, A, Z_bulk, A_bulk, frac_bulk,
+                          chunk_size=1 << 15):
+    """
+    Stix distribution of a minority for a broadcast scan of parameters.
+
+    Parameters
+    ----------
+    E : 1D ndarray
+        Energy grid [keV]; it must resolve Ti at low energy and extend
+        over several tail temperatures Te (1 + xi).
+    P, conc, Te, Ti, ne : float or ndarray
+        Absorbed power density [W/m^3], concentration n_min/ne,
+        temperatures [keV] and electron density [m^-3]; broadcast together.
+    Z, A : float
+        Charge and mass numbers of the minority.
+    Z_bulk, A_bulk : array_like, shape (nspecies,)
+        Bulk ion species for the critical energy.
+    frac_bulk : array_like, shape (..., nspecies)
+        Bulk ion fractions n_i/n_e (see critical_energy.critical_energy).
+    chunk_size : int
+        Number of (scan point, energy) values evaluated at once.
+
+    Returns
+    -------
+    F : ndarray, shape scan + (nE,)
+        Normalized energy distribution (see stix_distribution).
+    Ec : ndarray
+        Critical energy [keV].
+    xi : ndarray
+        Stix parameter.
+    """
+    F = Ec = xi = None
+    for shape, sl, F_c, Ec_c, xi_c in _scan(E, P, conc, Te, Ti, ne, Z, A, Z_bulk,
+                                            A_bulk, frac_bulk, chunk_size):
+        if F is None:
+            F = np.empty(shape + (np.size(E),))
+            Ec, xi = np.empty(shape), np.empty(shape)
+        F.reshape(-1, np.size(E))[sl] = F_c
+        Ec.reshape(-1)[sl] = Ec_c
+        xi.reshape(-1)[sl] = xi_c
+    return F, Ec, xi
+
+
+def minority_moments(E, P, conc, Te, Ti, ne, Z, A, Z_bulk, A_bulk, frac_bulk,
+                     E_tail=None, chunk_size=1 << 15):
+    """
+    Moments of the Stix distribution (see distribution_moments) over a
+    broadcast scan, without storing the distributions.
+
+    Parameters are those of minority_distribution and E_tail.
+
+    Returns
+    -------
+    Ec, xi, mean_E, tail, p_i, p_e : ndarray, scan shape
+        tail is None when E_tail is None.
+    """
+    out = None
+    for shape, sl, F_c, Ec_c, xi_c in _scan(E, P, conc, Te, Ti, ne, Z, A, Z_bulk,
+                                            A_bulk, frac_bulk, chunk_size):
+        mom = (Ec_c, xi_c) + distribution_moments(E, F_c, Ec_c, E_tail)
+        if out is None:
+            out = [None if m is None else np.empty(shape) for m in mom]
+        for o, m in zip(out, mom):
+            if o is not None:
+                o.reshape(-1)[sl] = m
+    return tuple(out)
+
+
+def distribution_moments(E, F, Ec, E_tail=None):
+    """
+    Fast-ion content and collisional power split of distributions F(E).
+
+    Parameters
+    ----------
+    E : 1D ndarray
+        Energy grid [keV].
+    F : ndarray, shape scan + (nE,)
+        Normalized energy distributions.
+    Ec : float or ndarray
+        Critical energy [keV], broadcast with the scan shape.
+    E_tail : float, optional
+        Threshold energy [keV] of the tail fraction.
+
+    Returns
+    -------
+    mean_E : ndarray
+        Mean energy [keV] (stored energy per minority ion).
+    tail : ndarray or None
+        Fraction of the minority above E_tail.
+    p_i, p_e : ndarray
+        Fractions of the collisional power transferred to the bulk ions
+        and electrons (drag ∝ E (Ec/E)^(3/2) on ions and ∝ E on electrons).
+    """
+    E = np.asarray(E, dtype=float)
+    mean_E = _trapz(F * E, E)
+    tail = None if E_tail is None else _trapz(np.where(E >= E_tail, F, 0.0), E)
+    Ec = np.asarray(Ec, dtype=float)[..., None]
+    # E (Ec/E)^1.5 = Ec^1.5 / sqrt(E); F ~ sqrt(E) keeps it finite at E = 0
+    with np.errstate(divide='ignore'):
+        w_i = np.where(E > 0, Ec**1.5 / np.sqrt(E), 0.0)
+    p_i_raw = _trapz(F * w_i, E)
+    p_i = p_i_raw / (p_i_raw + mean_E)
+    return mean_E, tail, p_i, 1.0 - p_i
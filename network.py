@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Network algebra on stacked S matrices for matching-circuit studies.
+
+Every function works on arrays of shape (..., n, n) (e.g. (nf, n, n) from
+load.load_touchstone) whose leading axes broadcast: a sweep of component
+values of shape (nC, 1) against nf frequencies gives (nC, nf, 2, 2)
+component matrices, and each connection is one batched np.linalg.solve
+(closed forms for chains of 2-ports):
+
+    f, S, z0 = load_touchstone("antenna.s4p")                  # (nf, 4, 4)
+    C = np.linspace(50e-12, 500e-12, 1000)[:, None]             # (nC, 1)
+    arm = cascade(series(capacitor_impedance(f, C), z0),        # (nC, nf, 2, 2)
+                  transmission_line(f, 1.2, 30.0, z0))
+    S1 = terminate(S, [1, 2, 3], 0.0)         # strap 1, others matched: (nf, 1, 1)
+    Gin = terminate(arm, [1], S1[..., 0])     # input of the arm: (nC, nf, 1, 1)
+    S5 = connect(S, [0], arm, [1])            # ports: straps 2..4, then arm input
+
+Reduce the antenna to the ports that matter before connecting it to large
+component sweeps: the cost scales with the batch size times n³.
+
+Reference impedances are real; z0 may be one value or one per port.
+Ports are 0-based.
+"""
+
+import numpy as np
+from ICRF_parameters import Const
+
+
+def _z0(z0, n):
+    return np.broadcast_to(np.asarray(z0, dtype=float), (n,))
+
+
+def _eye(n):
+    return np.eye(n, dtype=complex)
+
+
+def s_to_z(S, z0=50.0):
+    """Impedance matrix Z = √z0 (I - S)^-1 (I + S) √z0."""
+    S = np.asarray(S, dtype=complex)
+    n = S.shape[-1]
+    r = np.sqrt(_z0(z0, n))
+    return r[:, None] * np.linalg.solve(_eye(n) - S, _eye(n) + S) * r
+
+
+def z_to_s(Z, z0=50.0):
+    """Scattering matrix S = (z - I)(z + I)^-1 with z = Z / √(z0 z0ᵀ)."""
+    Z = np.asarray(Z, dtype=complex)
+    n = Z.shape[-1]
+    r = np.sqrt(_z0(z0, n))
+    z = Z / r[:, None] / r
+    # (z - I)(z + I)^-1 = ((z + I)^-T (z - I)^T)^T
+    return np.swapaxes(np.linalg.solve(np.swapaxes(z + _eye(n), -1, -2),
+                                       np.swapaxes(z - _eye(n), -1, -2)), -1, -2)
+
+
+def s_to_y(S, z0=50.0):
+    """Admittance matrix Y = √y0 (I + S)^-1 (I - S) √y0."""
+    S = np.asarray(S, dtype=complex)
+    n = S.shape[-1]
+    r = 1.0 / np.sqrt(_z0(z0, n))
+    return r[:, None] * np.linalg.solve(_eye(n) + S, _eye(n) - S) * r
+
+
+def y_to_s(Y, z0=50.0):
+    """Scattering matrix S = (I - y)(I + y)^-1 with y = Y √(z0 z0ᵀ)."""
+    Y = np.asarray(Y, dtype=complex)
+    n = Y.shape[-1]
+    r = np.sqrt(_z0(z0, n))
+    y = Y * r[:, None] * r
+    return np.swapaxes(np.linalg.solve(np.swapaxes(_eye(n) + y, -1, -2),
+                                       np.swapaxes(_eye(n) - y, -1, -2)), -1, -2)
+
+
+def renormalize(S, z0_old, z0_new):
+    """S matrix referred to new (real) port impedances."""
+    return z_to_s(s_to_z(S, z0_old), z0_new)
+
+
+def abcd_to_s(A, B, C, D, z0=50.0):
+    """2-port S matrix, shape (..., 2, 2), from broadcast ABCD parameters."""
+    A, B, C, D = np.broadcast_arrays(*(np.asarray(v, dtype=complex) for v in (A, B, C, D)))
+    Bn, Cn = B / z0, C * z0
+    den = A + Bn + Cn + D
+    S = np.empty(A.shape + (2, 2), dtype=complex)
+    S[..., 0, 0] = (A + Bn - Cn - D) / den
+    S[..., 0, 1] = 2.0 * (A * D - B * C) / den
+    S[..., 1, 0] = 2.0 / den
+    S[..., 1, 1] = (-A + Bn - Cn + D) / den
+    return S
+
+
+def series(Z, z0=50.0):
+    """2-port of a series impedance Z [Ohm]."""
+    return abcd_to_s(1.0, Z, 0.0, 1.0, z0)
+
+
+def shunt(Y, z0=50.0):
+    """2-port of a shunt admittance Y [S]."""
+    return abcd_to_s(1.0, 0.0, Y, 1.0, z0)
+
+
+def capacitor_impedance(f, C):
+    """Impedance 1 / (jωC) of a capacitor C [F] at f [Hz]."""
+    return 1.0 / (2j * np.pi * np.asarray(f) * np.asarray(C))
+
+
+def inductor_impedance(f, L):
+    """Impedance jωL of an inductor L [H] at f [Hz]."""
+    return 2j * np.pi * np.asarray(f) * np.asarray(L)
+
+
+def _gamma_l(f, length, vf, alpha):
+    """Complex electrical length (α + jβ) l of a line."""
+    beta = 2 * np.pi * np.asarray(f) / (vf * Const.c)
+    return (alpha + 1j * beta) * np.asarray(length)
+
+
+def transmission_line(f, length, z_line, z0=50.0, vf=1.0, alpha=0.0):
+    """
+    2-port of a transmission line.
+
+    Parameters:
+      f : float or numpy.ndarray
+          Frequency [Hz].
+      length : float or numpy.ndarray
+          Line length [m].
+      z_line : float or numpy.ndarray
+          Characteristic impedance [Ohm].
+      z0 : float
+          Reference impedance of the ports [Ohm].
+      vf : float
+          Velocity factor.
+      alpha : float
+          Attenuation [Np/m].
+
+    Returns:
+      S : numpy.ndarray
+          Shape broadcast(f, length, z_line) + (2, 2).
+    """
+    gl = _gamma_l(f, length, vf, alpha)
+    return abcd_to_s(np.cosh(gl), z_line * np.sinh(gl), np.sinh(gl) / z_line,
+                     np.cosh(gl), z0)
+
+
+def stub_admittance(f, length, z_line, end='short', vf=1.0, alpha=0.0):
+    """Input admittance [S] of a short- or open-circuited stub."""
+    t = np.tanh(_gamma_l(f, length, vf, alpha))
+    if end == 'short':
+        return 1.0 / (z_line * t)
+    if end == 'open':
+        return t / z_line
+    raise ValueError("end must be 'short' or 'open'.")
+
+
+def hybrid():
+    """Ideal 3 dB 90° hybrid: 1 -> 2 (-90°) and 3 (-180°), 4 isolated."""
+    return -np.array([[0, 1j, 1, 0],
+                      [1j, 0, 0, 1],
+                      [1, 0, 0, 1j],
+                      [0, 1, 1j, 0]]) / np.sqrt(2.0)
+
+
+def _reduce(S, internal, G):
+    """
+    Eliminate the internal ports, where a_int = G b_int:
+    S_ee + S_ei G (I - S_ii G)^-1 S_ie.
+    """
+    n = S.shape[-1]
+    ext = np.setdiff1d(np.arange(n), internal)
+    S_ee = S[..., ext[:, None], ext]
+    S_ei = S[..., ext[:, None], internal]
+    S_ie = S[..., internal[:, None], ext]
+    S_ii = S[..., internal[:, None], internal]
+    X = np.linalg.solve(_eye(len(internal)) - S_ii @ G, S_ie)
+    return S_ee + S_ei @ G @ X
+
+
+def _ports(ports, n):
+    ports = np.atleast_1d(np.asarray(ports, dtype=int))
+    if ports.size and (ports.min() < 0 or ports.max() >= n or len(set(ports)) != ports.size):
+        raise ValueError(f"Invalid ports {ports.tolist()} for a {n}-port network.")
+    return ports
+
+
+def terminate(S, ports, gamma):
+    """
+    Terminate ports on loads of reflection coefficient gamma.
+
+    Parameters:
+      S : numpy.ndarray
+          Shape (..., n, n).
+      ports : list of int
+          Ports to terminate.
+      gamma : complex or numpy.ndarray
+          Load reflection coefficients, shape (..., len(ports)) or broadcast
+          (0: matched, 1: open, -1: short).
+
+    Returns:
+      numpy.ndarray of shape (..., n - len(ports), n - len(ports)); the
+      remaining ports keep their order.
+    """
+    S = np.asarray(S, dtype=complex)
+    ports = _ports(ports, S.shape[-1])
+    gamma = np.broadcast_to(np.asarray(gamma, dtype=complex),
+                            np.broadcast_shapes(np.shape(gamma), (ports.size,)))
+    G = gamma[..., :, None] * _eye(ports.size)
+    return _reduce(S, ports, G)
+
+
+def connect_ports(S, pairs):
+    """
+    Connect pairs of ports of one network to each other.
+
+    Parameters:
+      S : numpy.ndarray
+          Shape (..., n, n).
+      pairs : list of (int, int)
+          Ports joined by a direct (zero-length) connection; both ports
+          must have the same reference impedance.
+
+    Returns:
+      numpy.ndarray without the connected ports, the others keep their
+      order.
+    """
+    S = np.asarray(S, dtype=complex)
+    pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+    internal = _ports(pairs.ravel(), S.shape[-1])
+    # a_p = b_q and a_q = b_p: G swaps the members of each pair
+    m = internal.size
+    G = np.zeros((m, m), dtype=complex)
+    G[np.arange(0, m, 2), np.arange(1, m, 2)] = 1.0
+    G[np.arange(1, m, 2), np.arange(0, m, 2)] = 1.0
+    order = np.argsort(internal)
+    return _reduce(S, internal[order], G[np.ix_(order, order)])
+
+
+def block_diagonal(SA, SB):
+    """Two networks side by side: ports of SA, then ports of SB."""
+    SA = np.asarray(SA, dtype=complex)
+    SB = np.asarray(SB, dtype=complex)
+    na, nb = SA.shape[-1], SB.shape[-1]
+    batch = np.broadcast_shapes(SA.shape[:-2], SB.shape[:-2])
+    S = np.zeros(batch + (na + nb, na + nb), dtype=complex)
+    S[..., :na, :na] = SA
+    S[..., na:, na:] = SB
+    return S
+
+
+def connect(SA, ports_a, SB, ports_b):
+    """
+    Connect ports_a of SA to ports_b of SB (pairwise).
+
+    Returns:
+      numpy.ndarray with the remaining ports of SA, then those of SB.
+    """
+    na = np.asarray(SA).shape[-1]
+    ports_a = _ports(ports_a, na)
+    ports_b = _ports(ports_b, np.asarray(SB).shape[-1])
+    if ports_a.size != ports_b.size:
+        raise ValueError("ports_a and ports_b must have the same length.")
+    return connect_ports(block_diagonal(SA, SB), np.column_stack([ports_a, ports_b + na]))
+
+
+def cascade(*networks):
+    """Chain 2-ports: port 2 of each network to port 1 of the next."""
+    S = np.asarray(networks[0], dtype=complex)
+    for nxt in networks[1:]:
+        nxt = np.asarray(nxt, dtype=complex)
+        if S.shape[-2:] != (2, 2) or nxt.shape[-2:] != (2, 2):
+            raise ValueError("cascade needs 2-port networks; use connect.")
+        # closed form of connect(S, [1], nxt, [0]) for 2-ports
+        d = 1.0 - S[..., 1, 1] * nxt[..., 0, 0]
+        out = np.empty(np.broadcast_shapes(S.shape, nxt.shape), dtype=complex)
+        out[..., 0, 0] = S[..., 0, 0] + S[..., 0, 1] * S[..., 1, 0] * nxt[..., 0, 0] / d
+        out[..., 0, 1] = S[..., 0, 1] * nxt[..., 0, 1] / d
+        out[..., 1, 0] = S[..., 1, 0] * nxt[..., 1, 0] / d
+        out[..., 1, 1] = nxt[..., 1, 1] + nxt[..., 1, 0] * nxt[..., 0, 1] * S[..., 1, 1] / d
+        S = out
+    return S
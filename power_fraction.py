@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stix power redistribution fractions of a slowing-down fast ion.
+
+A fast ion of energy E0 gives the fraction
+
+    p_i(x) = 1/x ∫_0^x dy / (1 + y^(3/2)),      x = E0 / Ec,
+
+of its energy to the bulk ions and p_e = 1 - p_i to the electrons. With
+y = u² the integral has the closed form (s = sqrt(x))
+
+    I(s) = 1/3 ln((s² - s + 1)/(1 + s)²) + 2/sqrt(3) (atan((2s - 1)/sqrt(3)) + π/6),
+
+used here instead of a quadrature per point; its series
+p_i = Σ_k (-1)^k x^(3k/2) / (3k/2 + 1) replaces it at small x, where the
+closed form cancels. All functions accept arrays of any shape.
+
+    from power_fraction import ion_power_fraction, ion_power_fraction_inverse
+    p_i = ion_power_fraction(E0 / Ec)
+    x_half = ion_power_fraction_inverse(0.5)       # E0/Ec where p_i = p_e
+"""
+
+import numpy as np
+
+_SERIES_X = 0.25      # below this x the series is used (x^1.5 <= 1/8)
+_SERIES_TERMS = 18
+
+
+def _closed_form_integral(s):
+    """∫_0^(s²) dy / (1 + y^1.5) for s = sqrt(x) >= 0."""
+    r3 = np.sqrt(3.0)
+    return (np.log((s * s - s + 1.0) / (1.0 + s)**2) / 3.0
+            + 2.0 / r3 * (np.arctan((2.0 * s - 1.0) / r3) + np.pi / 6.0))
+
+
+def ion_power_fraction(x):
+    """
+    Fraction p_i of the fast-ion energy transferred to the bulk ions.
+
+    Parameters
+    ----------
+    x : float or ndarray
+        Normalized fast-ion energy E0 / Ec (>= 0).
+
+    Returns
+    -------
+    p_i : float or ndarray
+        Same shape as x; 1 at x = 0, NaN for x < 0.
+    """
+    x = np.asarray(x, dtype=float)
+    small = x < _SERIES_X
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = _closed_form_integral(np.sqrt(x)) / x
+
+    # series in t = -x^1.5, summed by Horner's rule
+    t = -np.where(small, np.maximum(x, 0.0), 0.0)**1.5
+    ps = np.zeros_like(x)
+    for k in range(_SERIES_TERMS - 1, -1, -1):
+        ps = ps * t + 1.0 / (1.5 * k + 1.0)
+    p = np.where(small, ps, p)
+    p = np.where(x < 0, np.nan, p)
+    return p[()] if p.ndim == 0 else p
+
+
+def electron_power_fraction(x):
+    """Fraction p_e = 1 - p_i of the fast-ion energy transferred to the electrons."""
+    return 1.0 - ion_power_fraction(x)
+
+
+# log-spaced table used to start the Newton iteration of the inverse
+_TABLE_X = np.logspace(-4, 8, 241)
+_TABLE_P = ion_power_fraction(_TABLE_X)
+
+
+def ion_power_fraction_inverse(p, maxiter=8):
+    """
+    Normalized energy x = E0/Ec at which p_i(x) = p (inverse of
+    ion_power_fraction, which decreases from 1 to 0).
+
+    Parameters
+    ----------
+    p : float or ndarray
+        Ion fraction in (0, 1].
+    maxiter : int
+        Newton steps (in log x) after the tabulated first guess.
+
+    Returns
+    -------
+    x : float or ndarray
+        Same shape as p; 0 for p = 1, NaN outside (0, 1].
+    """
+    p = np.asarray(p, dtype=float)
+    valid = (p > 0) & (p < 1)
+    # p_i is decreasing: interpolate log x on the reversed table
+    t = np.interp(np.where(valid, p, 0.5), _TABLE_P[::-1], np.log(_TABLE_X[::-1]))
+    for _ in range(maxiter):
+        x = np.exp(t)
+        pi = ion_power_fraction(x)
+        # d p_i / d ln x = 1/(1 + x^1.5) - p_i
+        t = t - (pi - np.where(valid, p, 0.5)) / (1.0 / (1.0 + x**1.5) - pi)
+    x = np.where(valid, np.exp(t), np.nan)
+    x = np.where(p == 1, 0.0, x)
+    return x[()] if x.ndim == 0 else x
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cold/hot plasma quantities along measured radial profiles.
+
+Res_Freq.py gives the cyclotron resonance frequencies in the vacuum field
+B(R) = B0 R0 / R, and dispersion_relationship.py scans the density at a
+fixed field. Here both are combined on profiles ne(R), Te(R), Ti(R) of
+many shots or time slices at once: every input carries the batch axes
+(...) and the profiles a trailing radial axis (..., nR).
+
+    R = np.linspace(R0 - a, R0 + a, 200)            # (nR,)
+    ne = ne0[:, None] * (1 - ((R - R0) / a)**2)     # (nshot, nR)
+    out = scan_profiles(R, ne, f, kpar, B0, R0, Z, A, frac[:, None, :])
+    out['kperp2_fast']    # (nshot, nR)
+    out['R_res']          # (nshot, nspecies, nharmonic)
+    out['R_ii']           # (nshot, k) S = 0 (ion-ion hybrid) layers
+
+Layers along R are bracketed on the profile samples and refined with the
+exact B(R) and linearly interpolated ne and composition.
+"""
+
+import numpy as np
+from cold_plasma import stix_parameters, solve_kperp2
+from hot_plasma import solve_kperp_hot
+from layers import cold_quantity, sign_changes, refine_brackets, pad_crossings
+from resonance import resonance_radius
+
+
+def toroidal_field(R, B0, R0):
+    """Vacuum toroidal field B(R) = B0 R0 / R [T]."""
+    return np.asarray(B0) * np.asarray(R0) / np.asarray(R)
+
+
+def cyclotron_resonance_radius(f, B0, R0, Z, A, harmonics=(1,)):
+    """
+    Major radius of the n-th harmonic cyclotron resonance ω = n Ω_ci(R).
+
+    Parameters
+    ----------
+    f, B0, R0 : float or ndarray
+        Frequency [Hz], field at R0 [T] and reference radius [m].
+    Z, A : array_like, shape (nspecies,)
+        Ion charge and mass numbers.
+    harmonics : sequence of int
+        Harmonic numbers n.
+
+    Returns
+    -------
+    R_res : ndarray, shape broadcast(f, B0, R0) + (nspecies, nharmonic)
+        Resonance radii [m] (not restricted to the plasma).
+    """
+    n = np.asarray(harmonics, dtype=float)
+    Z = np.asarray(Z, dtype=float)[:, None]
+    A = np.asarray(A, dtype=float)[:, None]
+    ex = (Ellipsis, None, None)
+    return resonance_radius(np.asarray(f, dtype=float)[ex], n, Z, A,
+                            np.asarray(B0, dtype=float)[ex], np.asarray(R0, dtype=float)[ex])
+
+
+def locate_profile_layers(quantity, R, ne, f, kpar, B0, R0, Z, A, frac,
+                          rtol=4 * np.finfo(float).eps, maxiter=200):
+    """
+    Crossings along R of one of layers.QUANTITIES for a batch of profiles.
+
+    Parameters
+    ----------
+    quantity : str
+        One of layers.QUANTITIES (e.g. 'S' for the ion-ion hybrid
+        resonance, 'kfast2' for the fast-wave cutoffs).
+    R, ne, f, kpar, B0, R0, Z, A, frac : see scan_profiles.
+
+    Returns
+    -------
+    Rc : ndarray, shape batch + (nmax,)
+        Crossing radii, ascending along the profile, NaN padded.
+    pole : bool ndarray, same shape
+        True where the sign change is a pole (resonance) and not a zero.
+    """
+    R, ne, frac, point, shape = _batch(R, ne, f, kpar, B0, R0, frac)
+    B = toroidal_field(R, point['B0'][..., None], point['R0'][..., None])
+    y = cold_quantity(quantity, point['f'][..., None], B, ne,
+                      point['kpar'][..., None], Z, A, frac)
+    *pidx, i = np.nonzero(sign_changes(y))
+    pidx = tuple(pidx)
+
+    Ra, Rb = R[pidx + (i,)], R[pidx + (i + 1,)]
+    nea, neb = ne[pidx + (i,)], ne[pidx + (i + 1,)]
+    fra, frb = frac[pidx + (i,)], frac[pidx + (i + 1,)]
+    p = {k: np.broadcast_to(v[pidx], i.shape) for k, v in point.items()}
+
+    def func(x, sel):
+        w = (x - Ra[sel]) / (Rb[sel] - Ra[sel])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return cold_quantity(quantity, p['f'][sel],
+                                 toroidal_field(x, p['B0'][sel], p['R0'][sel]),
+                                 nea[sel] + w * (neb[sel] - nea[sel]), p['kpar'][sel],
+                                 Z, A, fra[sel] + w[:, None] * (frb[sel] - fra[sel]))
+
+    fa, fb = y[pidx + (i,)], y[pidx + (i + 1,)]
+    Rc = refine_brackets(func, Ra, Rb, fa, fb, rtol=rtol, maxiter=maxiter)
+    fc = np.abs(func(Rc, np.arange(Rc.size)))
+    is_pole = ~(fc <= np.maximum(np.abs(fa), np.abs(fb)))
+    return pad_crossings(shape, pidx, Rc, is_pole)
+
+
+def _batch(R, ne, f, kpar, B0, R0, frac):
+    """Broadcast the profiles to batch + (nR,) and the scalars to batch."""
+    R = np.asarray(R, dtype=float)
+    ne = np.asarray(ne, dtype=float)
+    frac = np.asarray(frac, dtype=float)
+    point = {'f': f, 'kpar': kpar, 'B0': B0, 'R0': R0}
+    point = {k: np.asarray(v, dtype=float) for k, v in point.items()}
+    shape = np.broadcast_shapes(R.shape[:-1], ne.shape[:-1], frac.shape[:-2],
+                                *(v.shape for v in point.values()))
+    nR = np.broadcast_shapes(R.shape[-1:], ne.shape[-1:], frac.shape[-2:-1])
+    R = np.broadcast_to(R, shape + nR)
+    ne = np.broadcast_to(ne, shape + nR)
+    frac = np.broadcast_to(frac, shape + nR + frac.shape[-1:])
+    point = {k: np.broadcast_to(v, shape) for k, v in point.items()}
+    return R, ne, frac, point, shape
+
+
+def _zeros_only(Rc, pole):
+    """Drop the poles from NaN-padded crossings, keeping ascending order."""
+    Rc = np.sort(np.where(pole, np.nan, Rc), axis=-1)
+    keep = np.any(~np.isnan(Rc.reshape(-1, Rc.shape[-1])), axis=0)
+    return Rc[..., :int(keep.sum())]
+
+
+def scan_profiles(R, ne, f, kpar, B0, R0, Z, A, frac, Te=None, Ti=None,
+                  harmonics=(1, 2), nharm=3, chunk_size=1 << 16):
+    """
+    Field, Stix parameters, k_perp^2 and layer positions along a batch of
+    radial profiles.
+
+    Parameters
+    ----------
+    R : ndarray, shape (..., nR)
+        Major radius of the profile samples [m], ascending.
+    ne : ndarray, shape (..., nR)
+        Electron density [m^-3].
+    f, kpar, B0, R0 : float or ndarray, shape (...)
+        Frequency [Hz], parallel wavenumber [m^-1], field at R0 [T] and
+        reference radius [m] of each profile.
+    Z, A : array_like, shape (nspecies,)
+        Ion charge and mass numbers.
+    frac : ndarray, shape (..., nR, nspecies)
+        Ion fractions n_i/n_e along the profiles (frac[..., None, :] for
+        a composition constant along R).
+    Te, Ti : ndarray, shape (..., nR), optional
+        Electron and ion temperatures [eV]; when both are given the hot
+        fast-wave k_perp^2 is added (see hot_plasma.solve_kperp_hot).
+    harmonics : sequence of int
+        Cyclotron harmonics reported in R_res.
+    nharm : int
+        Harmonics summed in the hot tensor.
+    chunk_size : int
+        Number of grid points evaluated at once by the k_perp solvers.
+
+    Returns
+    -------
+    out : dict of ndarray
+        'B', 'S', 'D', 'P', 'R', 'L' : shape (..., nR)
+        'kperp2_fast', 'kperp2_slow', 'flags' : cold roots and
+            RESONANCE / CONFLUENCE bits (see cold_plasma.solve_kperp2)
+        'kperp2_hot', 'converged' : hot fast wave, only with Te and Ti
+        'R_res' : shape (..., nspecies, len(harmonics)), cyclotron layers
+        'R_ii' : shape (..., k), S = 0 (ion-ion hybrid) layers, NaN padded
+        'R_cutoff' : shape (..., k), fast-wave cutoffs
+            k0²R = k∥² and k0²L = k∥², NaN padded
+    """
+    Rb, ne, frac_b, point, shape = _batch(R, ne, f, kpar, B0, R0, frac)
+    f1, kpar1 = point['f'][..., None], point['kpar'][..., None]
+    B = toroidal_field(Rb, point['B0'][..., None], point['R0'][..., None])
+
+    out = {'B': B}
+    out.update(zip('SDPRL', stix_parameters(f1, B, ne, Z, A, frac_b)))
+    out['kperp2_fast'], out['kperp2_slow'], out['flags'] = solve_kperp2(
+        f1, B, ne, kpar1, Z, A, frac_b, chunk_size=chunk_size)
+    if Te is not None and Ti is not None:
+        out['kperp2_hot'], out['converged'] = solve_kperp_hot(
+            f1, B, ne, kpar1, Z, A, frac_b, Te, Ti, nharm=nharm,
+            chunk_size=chunk_size)
+
+    out['R_res'] = cyclotron_resonance_radius(point['f'], point['B0'],
+                                              point['R0'], Z, A, harmonics)
+    args = (Rb, ne, point['f'], point['kpar'], point['B0'], point['R0'], Z, A, frac_b)
+    out['R_ii'] = _zeros_only(*locate_profile_layers('S', *args))
+    out['R_cutoff'] = _zeros_only(*locate_profile_layers('kfast2', *args))
+    return out
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Machine / species registry and analytic cyclotron resonance positions.
+
+In the vacuum toroidal field B(R) = B0 R0 / R the n-th harmonic resonance
+ω = n Ω_ci(R) of species (Z, A) is found in closed form:
+
+    R_res = n Z q_e B0 R0 / (2π f A m_p),     f_res = n Z q_e B0 R0 / (2π R A m_p)
+
+All arguments broadcast, and resonance_table evaluates every combination of
+machines, frequencies, species and harmonics in one call:
+
+    from resonance import resonance_table
+    R, names = resonance_table(["WEST", "JET"], [42e6, 55.5e6],
+                               ["H", "D", "He3"], harmonics=[1, 2])
+    # R[machine, frequency, species, harmonic] [m]
+"""
+
+import numpy as np
+from ICRF_parameters import Const
+
+# RB0: magnetic-axis major radius, R0: geometric major radius (B0 given at R0),
+# a: minor radius
+MACHINES = {
+    "WEST":  {"RB0": 2.5,  "R0": 2.5,  "a": 0.5,  "B0": 3.657},
+    "JET":   {"RB0": 2.96, "R0": 2.96, "a": 0.96, "B0": 3.7},
+    "CFEDR": {"RB0": 8.25, "R0": 7.8,  "a": 2.5,  "B0": 6.3},
+}
+
+SPECIES = {
+    "H":   {"Z": 1, "A": 1},
+    "D":   {"Z": 1, "A": 2},
+    "T":   {"Z": 1, "A": 3},
+    "He3": {"Z": 2, "A": 3},
+    "He4": {"Z": 2, "A": 4},
+    "Li7": {"Z": 3, "A": 7},
+    "Be9": {"Z": 4, "A": 9},
+}
+
+
+def machine_parameters(names):
+    """
+    Geometry of registered machines as arrays.
+
+    Parameters
+    ----------
+    names : str or sequence of str
+        Keys of MACHINES.
+
+    Returns
+    -------
+    RB0, R0, a, B0 : float or ndarray of shape (len(names),)
+    """
+    single = isinstance(names, str)
+    names = [names] if single else list(names)
+    unknown = [n for n in names if n not in MACHINES]
+    if unknown:
+        raise ValueError(f"Unknown machine(s) {unknown}, expected one of {list(MACHINES)}.")
+    out = tuple(np.array([MACHINES[n][k] for n in names], dtype=float)
+                for k in ("RB0", "R0", "a", "B0"))
+    return tuple(v[0] for v in out) if single else out
+
+
+def species_parameters(names):
+    """
+    Charge and mass numbers Z, A (arrays of shape (len(names),)) of
+    registered species (keys of SPECIES).
+    """
+    names = [names] if isinstance(names, str) else list(names)
+    unknown = [n for n in names if n not in SPECIES]
+    if unknown:
+        raise ValueError(f"Unknown species {unknown}, expected one of {list(SPECIES)}.")
+    Z = np.array([SPECIES[n]["Z"] for n in names], dtype=float)
+    A = np.array([SPECIES[n]["A"] for n in names], dtype=float)
+    return Z, A
+
+
+def _cyclotron_coef(harmonic, Z, A, B0, R0):
+    """n Ω_ci(R0) R0 = n Z q_e B0 R0 / (A m_p) [rad·m/s]."""
+    return (np.asarray(harmonic, dtype=float) * Const.omega_ci_coef()
+            * np.asarray(Z, dtype=float) / np.asarray(A, dtype=float)
+            * np.asarray(B0, dtype=float) * np.asarray(R0, dtype=float))
+
+
+def resonance_radius(f, harmonic, Z, A, B0, R0):
+    """
+    Major radius [m] of the n-th harmonic cyclotron resonance at frequency
+    f [Hz] in the field B0 [T] given at R0 [m]; all arguments broadcast.
+    """
+    return _cyclotron_coef(harmonic, Z, A, B0, R0) / (2.0 * np.pi * np.asarray(f, dtype=float))
+
+
+def resonance_frequency(R, harmonic, Z, A, B0, R0):
+    """
+    Frequency [Hz] placing the n-th harmonic cyclotron resonance at the
+    major radius R [m] (inverse of resonance_radius); all arguments
+    broadcast.
+    """
+    return _cyclotron_coef(harmonic, Z, A, B0, R0) / (2.0 * np.pi * np.asarray(R, dtype=float))
+
+
+def resonance_table(machines, f, species, harmonics=(1,), inverse=False):
+    """
+    Resonance radii (or frequencies) for all combinations of machines,
+    frequencies (or radii), species and harmonics.
+
+    Parameters
+    ----------
+    machines : sequence of str
+        Keys of MACHINES.
+    f : array_like
+        Frequencies [Hz], or radii [m] when inverse is True; any shape.
+    species : sequence of str
+        Keys of SPECIES.
+    harmonics : sequence of int
+        Harmonic numbers.
+    inverse : bool
+        Return resonance frequencies at the radii f instead.
+
+    Returns
+    -------
+    out : ndarray, shape (nmachine,) + f.shape + (nspecies, nharmonic)
+    names : dict
+        Labels of the axes: 'machine', 'species', 'harmonic'.
+    """
+    machines = [machines] if isinstance(machines, str) else list(machines)
+    species = [species] if isinstance(species, str) else list(species)
+    _, R0, _, B0 = machine_parameters(machines)
+    Z, A = species_parameters(species)
+    x = np.asarray(f, dtype=float)
+    n = np.asarray(harmonics, dtype=float)
+
+    expand = (slice(None),) + (None,) * (x.ndim + 2)
+    func = resonance_frequency if inverse else resonance_radius
+    out = func(x[None, ..., None, None], n, Z[:, None], A[:, None],
+               B0[expand], R0[expand])
+    return out, {"machine": machines, "species": species, "harmonic": list(harmonics)}
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless batch rendering of Smith charts for many touchstone files.
+
+Each worker of a process pool draws the chart grid once on an Agg canvas
+(no pyplot, no interactive figure numbers), then for every file loads the
+S matrix, overplots the requested loci with smith_chart.smith_traces,
+writes the image and removes the traces again:
+
+    from smith_batch import render_smith_batch
+    report = render_smith_batch("runs/*.s4p", "report/smith", fmt="png")
+    for r in report:
+        print(r['file'], r['output'], r['load_s'], r['render_s'], r['error'])
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from load import load_touchstone
+from smith_chart import smith_axes, smith_traces
+from touchstone_cache import load_touchstone_cached
+
+# chart of the current worker process, keyed by figure size
+_CHART = {}
+
+
+def _chart(figsize):
+    """Figure and axes with the grid drawn, created once per worker."""
+    if figsize not in _CHART:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        fig.set_facecolor('white')
+        ax = smith_axes(fig.add_subplot(111))
+        _CHART[figsize] = fig, ax
+    return _CHART[figsize]
+
+
+def _output_names(files, outdir, fmt):
+    """Image names from the paths relative to the common parent directory."""
+    paths = [os.path.abspath(fname) for fname in files]
+    parent = os.path.commonpath([os.path.dirname(p) for p in paths])
+    names = []
+    for path in paths:
+        base = os.path.splitext(os.path.relpath(path, parent))[0]
+        base = base.replace(os.sep, '_')
+        names.append(os.path.join(outdir, f"{base}.{fmt}"))
+    seen = {}
+    for fname, name in zip(files, names):
+        if name in seen:
+            raise ValueError(f"{seen[name]} and {fname} would both be "
+                             f"rendered to {name}.")
+        seen[name] = fname
+    return names
+
+
+def _render_one(job):
+    fname, out, ports, arrows, figsize, dpi, cache_dir = job
+    record = {'file': fname, 'output': out, 'load_s': 0.0, 'render_s': 0.0,
+              'error': None}
+    t0 = time.perf_counter()
+    try:
+        if cache_dir is None:
+            f, S, z0 = load_touchstone(fname)
+        else:
+            f, S, z0 = load_touchstone_cached(fname, cache_dir)
+        t1 = time.perf_counter()
+        record['load_s'] = t1 - t0
+
+        n = S.shape[1]
+        pairs = [(i, i) for i in range(1, n + 1)] if ports is None else ports
+        if any(not (1 <= i <= n and 1 <= j <= n) for i, j in pairs):
+            raise ValueError(f"Port pair out of range for a {n}-port file.")
+        traces = S[:, [i - 1 for i, _ in pairs], [j - 1 for _, j in pairs]]
+
+        fig, ax = _chart(figsize)
+        ncoll, npatch = len(ax.collections), len(ax.patches)
+        smith_traces(traces, ax=ax, arrows=arrows,
+                     labels=[f"S{i}{j}" for i, j in pairs])
+        ax.set_title(os.path.basename(fname), fontsize=10, pad=22)
+        try:
+            fig.savefig(out, dpi=dpi)
+        finally:
+            # keep only the grid for the next file
+            for artist in ax.collections[ncoll:] + ax.patches[npatch:]:
+                artist.remove()
+            if ax.get_legend() is not None:
+                ax.get_legend().remove()
+            ax.set_title('')
+        record['render_s'] = time.perf_counter() - t1
+    except Exception as err:     # reported per file, the batch goes on
+        record['error'] = f"{type(err).__name__}: {err}"
+    return record
+
+
+def render_smith_batch(files, outdir, ports=None, fmt='png', processes=None,
+                       arrows=2, figsize=(7.5, 5.5), dpi=100, cache_dir=None,
+                       chunksize=2):
+    """
+    Render one Smith chart per touchstone file in a process pool.
+
+    Parameters:
+      files : str or list of str
+          Glob pattern (e.g. 'runs/*.s4p') or explicit list of files.
+      outdir : str
+          Output directory (created). Images are named after the paths
+          relative to the common parent of the files, with the directory
+          separators replaced by '_' ('shotA/antenna.s4p' gives
+          'shotA_antenna.png'); files in one directory keep their names.
+      ports : list of (int, int), optional
+          1-based port pairs (i, j) of the loci S_ij to draw (default: all
+          reflection coefficients S_ii).
+      fmt : str
+          Image format understood by savefig ('png', 'svg', 'pdf', ...).
+      processes : int, optional
+          Number of worker processes (default: number of CPUs); 1 renders
+          serially in the calling process.
+      arrows : int
+          Direction arrows per trace (see smith_chart.smith_traces).
+      figsize, dpi :
+          Figure size in inches and resolution.
+      cache_dir : str, optional
+          Read the files through touchstone_cache with this directory.
+      chunksize : int
+          Number of files sent to a worker at once.
+
+    Returns:
+      report : list of dict
+          One entry per file, in input order: 'file', 'output', 'load_s'
+          and 'render_s' (seconds), and 'error' (None, or the message of
+          the exception that stopped this file).
+    """
+    if isinstance(files, (str, os.PathLike)):
+        files = sorted(glob.glob(os.fspath(files)))
+    else:
+        files = [os.fspath(fname) for fname in files]
+    if not files:
+        raise ValueError("No touchstone file to render.")
+    outputs = _output_names(files, outdir, fmt)
+    os.makedirs(outdir, exist_ok=True)
+
+    ports = None if ports is None else [tuple(p) for p in ports]
+    jobs = [(fname, out, ports, arrows, tuple(figsize), dpi, cache_dir)
+            for fname, out in zip(files, outputs)]
+    if processes == 1:
+        return [_render_one(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_render_one, jobs, chunksize=chunksize))
@@ -15,9 +15,13 @@ Created on Thu Feb 27 09:36:06 2025
 
 # %%
 'import Library or Package and release ram & close fig' 
+from functools import lru_cache
 import numpy as np
-from load import fun_load_touchstone as flt
+from load import load_touchstone
+from decimation import decimate_s
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 from matplotlib.patches import FancyArrowPatch
 
 # %% define of simth_chart
@@ -181,6 +185,183 @@ def smith_Smatrix(S, num=1, display_mode='points_and_arrows'):
     
     return fig
 
+# %% cached chart grid and collection-based traces
+
+RX = (0, 0.2, 0.5, 1, 2, 5, 10)   # Resistance circles
+RY = (0.2, 0.5, 1, 2, 10)         # Reactance circles
+
+
+@lru_cache(maxsize=None)
+def smith_grid(rx=RX, ry=RY, npts=361):
+    """
+    Segments of the Smith chart grid, computed once per style.
+
+    The circles are images of the lines Re z = r and Im z = x through
+    Γ = (z - 1)/(z + 1), sampled along tan(φ) so that the points are
+    spread evenly along each circle and the reactance arcs stop exactly
+    on the unit circle.
+
+    Returns:
+      grid : list of (n, 2) ndarray
+          Resistance circles, reactance arcs and the horizontal axis.
+      unit : (npts, 2) ndarray
+          Unit circle.
+    """
+    t = np.tan(np.linspace(-np.pi / 2, np.pi / 2, npts)[1:-1])
+    t_pos = np.tan(np.linspace(0, np.pi / 2, npts // 2)[:-1])
+
+    def gamma(z):
+        g = (z - 1) / (z + 1)
+        return np.column_stack([g.real, g.imag])
+
+    grid = [np.vstack([gamma(r + 1j * t), [1.0, 0.0]]) for r in rx]
+    for x in ry:
+        arc = np.vstack([gamma(t_pos + 1j * x), [1.0, 0.0]])
+        grid += [arc, arc * [1.0, -1.0]]
+    grid.append(np.array([[-1.0, 0.0], [1.0, 0.0]]))
+    phi = np.linspace(0, 2 * np.pi, npts)
+    unit = np.column_stack([np.cos(phi), np.sin(phi)])
+    for v in grid + [unit]:
+        v.setflags(write=False)
+    return grid, unit
+
+
+def smith_axes(ax=None, rx=RX, ry=RY, figsize=(6.5, 5.5), labels=True):
+    """
+    Draw the Smith chart grid on ax with two LineCollections.
+
+    Parameters:
+      ax : matplotlib Axes, optional
+          Target axes (a new figure is created if None).
+      rx, ry : tuple of float
+          Resistance and reactance values of the grid circles.
+      figsize : tuple
+          Size of the new figure when ax is None.
+      labels : bool
+          Annotate the circles as smith_Smatrix does.
+
+    Returns:
+      ax : matplotlib Axes
+    """
+    if ax is None:
+        fig, ax = plt.subplots(figsize=figsize)
+        fig.set_facecolor('white')
+    chart_color = [0.5, 0.5, 0.5]
+    Z_text_color = [0.5, 0, 0]
+    grid, unit = smith_grid(tuple(rx), tuple(ry))
+    ax.add_collection(LineCollection(grid, colors=[chart_color], linewidths=0.5))
+    ax.add_collection(LineCollection([unit], colors='k', linewidths=1))
+
+    if labels:
+        for xx in ry:
+            alpha_xx = 2 * np.arctan(1/xx)
+            for sgn in (1, -1):
+                ax.text(1.1*np.cos(alpha_xx), sgn*1.1*np.sin(alpha_xx),
+                        f"{'+' if sgn > 0 else '-'}{xx:.1f}",
+                        horizontalalignment='center', verticalalignment='center',
+                        fontsize=12, color=Z_text_color)
+        for rr in rx[1:]:
+            ax.text(rr/(1 + rr) - 1/(1 + rr), 0, f"{rr:.1f}",
+                    horizontalalignment='left', verticalalignment='bottom',
+                    color=Z_text_color, rotation=90, fontsize=12)
+        ax.text(-1.1, 0, "0.0", horizontalalignment='center',
+                verticalalignment='center', color=Z_text_color, fontsize=12)
+        ax.text(1.1, 0, r"$\infty$", horizontalalignment='center',
+                verticalalignment='center', color=Z_text_color, fontsize=12)
+
+    ax.set_aspect('equal')
+    ax.set_xlim([-1, 1])
+    ax.set_ylim([-1, 1])
+    ax.axis('off')
+    return ax
+
+
+def _arrow_positions(x, y, narrows, length=0.04):
+    """
+    Start and end indices of narrows arrows evenly spaced in arc length
+    along a trace; each arrow spans about length (in Γ units) of the trace.
+    """
+    d = np.hypot(np.diff(x), np.diff(y))
+    s = np.concatenate(([0.0], np.cumsum(d)))
+    if narrows < 1 or s[-1] == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    targets = s[-1] * (np.arange(narrows) + 1) / narrows
+    end = np.unique(np.clip(np.searchsorted(s, targets), 1, len(x) - 1))
+    start = np.searchsorted(s, s[end] - length, side='right') - 1
+    return np.clip(np.minimum(start, end - 1), 0, None), end
+
+
+def smith_traces(S, ax=None, labels=None, colors=None, arrows=3, markers=False,
+                 linewidth=1.5, max_points=None, **axes_kw):
+    """
+    Overplot many S-parameter loci on a Smith chart.
+
+    All traces are drawn with one LineCollection and the optional markers
+    with one scatter; direction arrows are drawn only at a few positions
+    evenly spaced along each trace, so the number of artists does not grow
+    with the number of points.
+
+    Parameters:
+      S : complex array_like
+          Shape (npts,) for one trace, (npts, ntrace) for several, or
+          (npts, n, n) for all Sij of a stacked S matrix.
+      ax : matplotlib Axes, optional
+          Axes with a chart grid; smith_axes(**axes_kw) is called if None.
+      labels : list of str, optional
+          Legend labels (default 'Sij' for stacked matrices).
+      colors : list, optional
+          One color per trace (default: the property cycle).
+      arrows : int
+          Number of direction arrows per trace (0 for none; 1 puts a
+          single arrow at the end point, as 'line_with_arrow').
+      markers : bool
+          Also mark every point (use for short sweeps).
+      linewidth : float
+          Trace width.
+      max_points : int, optional
+          Thin longer sweeps to about this many points per trace with
+          decimation.decimate_s before drawing (loops, corners and |S|
+          minima are kept).
+
+    Returns:
+      ax : matplotlib Axes
+    """
+    S = np.asarray(S)
+    if S.ndim == 3:
+        n = S.shape[1]
+        if labels is None:
+            labels = [f"S{i + 1}{j + 1}" for i in range(n) for j in range(S.shape[2])]
+        S = S.reshape(S.shape[0], -1)
+    elif S.ndim == 1:
+        S = S[:, None]
+    if max_points is not None and S.shape[0] > max_points:
+        S = S[decimate_s(S, n_out=max_points)]
+    if ax is None:
+        ax = smith_axes(**axes_kw)
+    if colors is None:
+        cycle = plt.rcParams['axes.prop_cycle'].by_key().get('color', ['blue'])
+        colors = [cycle[k % len(cycle)] for k in range(S.shape[1])]
+
+    x, y = np.real(S), np.imag(S)
+    ax.add_collection(LineCollection([np.column_stack([x[:, k], y[:, k]])
+                                      for k in range(S.shape[1])],
+                                     colors=colors, linewidths=linewidth, zorder=4))
+    if arrows and S.shape[0] > 1:
+        for k in range(S.shape[1]):
+            for i0, i1 in zip(*_arrow_positions(x[:, k], y[:, k], arrows)):
+                ax.add_patch(FancyArrowPatch((x[i0, k], y[i0, k]), (x[i1, k], y[i1, k]),
+                                             arrowstyle='-|>', mutation_scale=15,
+                                             shrinkA=0, shrinkB=0, color=colors[k],
+                                             linewidth=linewidth, zorder=5))
+    if markers:
+        ax.scatter(x.ravel(order='F'), y.ravel(order='F'), s=12, zorder=5,
+                   c=np.repeat(np.arange(S.shape[1]), S.shape[0]),
+                   cmap=plt.matplotlib.colors.ListedColormap(colors))
+    if labels is not None:
+        ax.legend([Line2D([], [], color=c, linewidth=linewidth) for c in colors],
+                  labels, loc='upper left', bbox_to_anchor=(1.08, 1.0), fontsize=10)
+    return ax
+
 # Example usage:
 if __name__ == "__main__":
     # Example S-parameters (complex values inside the unit circle)
@@ -200,13 +381,15 @@ if __name__ == "__main__":
     fre_units = {'MHz':1e6,'Hz':1}
     fre_u = fre_units[fre_unit]
     #load s4p file, trans to freauency and Smatrix
-    fre,S = flt(pre+fname)
+    fre,S,z0 = load_touchstone(pre+fname)
     fre = fre*fre_u
     # %% set the data
     x= fre
-    S11 = np.array([Smatrix[0,0] for Smatrix in S])
+    S11 = S[:, 0, 0]
     # %% plot smith chart
     smith_Smatrix(S11, 4,display_mode='line_with_arrow')
+    # all Sij of the file on one chart, grid drawn once
+    smith_traces(S, arrows=2)
     plt.show()
 
 
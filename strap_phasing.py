@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Strap phasing and power ratio for balanced coupled power.
+
+For two straps fed with a_2 = k a_1 the coupled powers are equal when
+Rc_1 / Rc_2 = k² ('3-straps antenna.ipynb'); since Rc depends on k through
+the active reflection coefficients, this is an equation in k to be solved
+for every phasing and frequency. Here, with the excitation of
+active_s.strap_excitation (uniform phase step dphi, amplitude ratio k on
+ratio_ports):
+
+  - balanced_ratio solves the power balance for k at every (dphi,
+    frequency) at once: sign changes on a log-spaced k grid give brackets
+    that are refined together (layers.refine_brackets);
+  - optimize_phasing then picks, per frequency, the phase step whose
+    balanced excitation has the smallest maximum active VSWR, on a phase
+    grid refined by a vectorized golden-section search.
+
+    f, S, z0 = load_touchstone("antenna.s3p")              # (nf, 3, 3)
+    best = optimize_phasing(S, z0=z0, ratio_ports=[1])
+    best['dphi'], best['k'], best['vswr']                   # (nf,)
+
+The list of load.fun_load_touchstone holds the transposed matrices for
+three or more ports, and gives the same result only for reciprocal
+(symmetric) S.
+"""
+
+import numpy as np
+from active_s import coupling_resistance, coupled_power, strap_excitation
+from layers import refine_brackets, sign_changes
+
+_GOLDEN = 0.5 * (np.sqrt(5.0) - 1.0)
+
+
+def _ports(n, ratio_ports):
+    mask = np.zeros(n, dtype=bool)
+    mask[list(range(1, n) if ratio_ports is None else ratio_ports)] = True
+    if mask.all() or not mask.any():
+        raise ValueError("ratio_ports must hold some but not all ports.")
+    return mask
+
+
+def _active(S, dphi, k, z0, mask):
+    """Γ, Rc and P for an excitation per S matrix: dphi, k of shape (..., nf)."""
+    n = S.shape[-1]
+    a = strap_excitation(dphi, k, n, ratio_ports=np.flatnonzero(mask))
+    b = (S @ a[..., None])[..., 0]
+    gamma = b / a
+    Rc = coupling_resistance(gamma, z0)
+    return gamma, Rc, coupled_power(Rc, a, z0)
+
+
+def _imbalance(S, dphi, k, z0, target, mask):
+    """Normalized mean P(ratio ports) - target · mean P(other ports), in [-1, 1]."""
+    _, _, P = _active(S, dphi, k, z0, mask)
+    pa = P[..., mask].mean(axis=-1)
+    pb = target * P[..., ~mask].mean(axis=-1)
+    with np.errstate(invalid='ignore'):
+        return (pa - pb) / (np.abs(pa) + np.abs(pb))
+
+
+def balanced_ratio(S, dphi, z0=50.0, target=1.0, ratio_ports=None,
+                   k_bounds=(0.05, 20.0), nk=49):
+    """
+    Amplitude ratio k that gives the target power balance.
+
+    Parameters:
+      S : numpy.ndarray
+          S matrices of shape (nf, nports, nports), e.g. S from
+          load.load_touchstone (np.array of the fun_load_touchstone list
+          is transposed for nports >= 3, equivalent only if S = S^T).
+      dphi : float or numpy.ndarray
+          Phase step between adjacent straps [rad], broadcast with (nf,)
+          (e.g. shape (nphi, 1) for a phasing grid).
+      z0 : float
+          Reference impedance in Ohm.
+      target : float or numpy.ndarray
+          Wanted ratio of the mean coupled power per strap of ratio_ports
+          to that of the other straps (1: equal powers).
+      ratio_ports : list of int, optional
+          0-based ports fed with k (default: all but the first).
+      k_bounds : (float, float)
+          Search interval of k.
+      nk : int
+          Number of log-spaced k samples used to bracket the solution.
+
+    Returns:
+      k : numpy.ndarray
+          Shape broadcast(dphi, (nf,)); the smallest balancing k in the
+          interval, NaN where there is none.
+    """
+    S = np.asarray(S)
+    mask = _ports(S.shape[-1], ratio_ports)
+    shape = np.broadcast_shapes(np.shape(dphi), S.shape[:1], np.shape(target))
+    dphi = np.broadcast_to(np.asarray(dphi, dtype=float), shape).reshape(-1, S.shape[0])
+    target = np.broadcast_to(np.asarray(target, dtype=float), shape).reshape(-1, S.shape[0])
+
+    # bracket on the grid of log k, for all points at once
+    logk = np.linspace(np.log(k_bounds[0]), np.log(k_bounds[1]), nk)
+    h = _imbalance(S, dphi, np.exp(logk)[:, None, None], z0, target, mask)
+    h = np.moveaxis(h, 0, -1).reshape(-1, nk)
+    change = sign_changes(h)
+    found = change.any(axis=-1)
+    first = np.argmax(change, axis=-1)
+    pts = np.flatnonzero(found)
+    lo, hi = logk[first[pts]], logk[first[pts] + 1]
+    flat_S = np.broadcast_to(S, dphi.shape + S.shape[1:]).reshape((-1,) + S.shape[1:])
+    phi, tgt = dphi.reshape(-1), target.reshape(-1)
+
+    def func(x, sel):
+        p = pts[sel]
+        return _imbalance(flat_S[p], phi[p], np.exp(x), z0, tgt[p], mask)
+
+    k = np.full(h.shape[0], np.nan)
+    k[pts] = np.exp(refine_brackets(func, lo, hi, h[pts, first[pts]],
+                                    h[pts, first[pts] + 1], rtol=1e-10))
+    return k.reshape(shape)
+
+
+def _max_vswr(S, dphi, z0, target, mask, k_bounds, nk):
+    """Balanced k and max active VSWR (inf where unbalanced), shape (..., nf)."""
+    k = balanced_ratio(S, dphi, z0, target, np.flatnonzero(mask), k_bounds, nk)
+    gamma, _, _ = _active(S, dphi, np.where(np.isnan(k), 1.0, k), z0, mask)
+    g = np.abs(gamma).max(axis=-1)
+    with np.errstate(divide='ignore'):
+        vswr = np.where(g < 1, (1 + g) / (1 - g), np.inf)
+    return k, np.where(np.isnan(k), np.inf, vswr)
+
+
+def optimize_phasing(S, z0=50.0, target=1.0, ratio_ports=None, nphi=72,
+                     k_bounds=(0.05, 20.0), nk=49, tol=1e-4, maxiter=40):
+    """
+    Per frequency, the phase step and power ratio giving the target power
+    balance with the smallest maximum active VSWR.
+
+    Parameters:
+      S : numpy.ndarray
+          S matrices of shape (nf, nports, nports).
+      z0, target, ratio_ports, k_bounds, nk :
+          See balanced_ratio (target may vary with frequency, shape (nf,)).
+      nphi : int
+          Number of phase steps of the initial grid over [0, 2π).
+      tol : float
+          Width [rad] of the final golden-section interval.
+      maxiter : int
+          Maximum number of golden-section iterations.
+
+    Returns:
+      out : dict
+          'dphi' [rad], 'k' and 'vswr' (max over ports), shape (nf,), and
+          'gamma' and 'P' (active reflection coefficients and coupled
+          powers for a unit reference amplitude), shape (nf, nports). All
+          are NaN where no phase step of the grid can be balanced.
+    """
+    S = np.asarray(S)
+    mask = _ports(S.shape[-1], ratio_ports)
+    nf = S.shape[0]
+    grid = 2 * np.pi * np.arange(nphi) / nphi
+    _, v = _max_vswr(S, grid[:, None], z0, target, mask, k_bounds, nk)
+    best = np.argmin(v, axis=0)
+    ok = np.isfinite(v[best, np.arange(nf)])
+
+    # golden section on [best - step, best + step]; infeasible phases are inf
+    step = 2 * np.pi / nphi
+    a, b = grid[best] - step, grid[best] + step
+    c, d = b - _GOLDEN * (b - a), a + _GOLDEN * (b - a)
+    _, vc = _max_vswr(S, c, z0, target, mask, k_bounds, nk)
+    _, vd = _max_vswr(S, d, z0, target, mask, k_bounds, nk)
+    for _ in range(maxiter):
+        if np.all(b - a <= tol):
+            break
+        left = vc <= vd          # minimum in [a, d]
+        a, b = np.where(left, a, c), np.where(left, d, b)
+        c_new, d_new = b - _GOLDEN * (b - a), a + _GOLDEN * (b - a)
+        x = np.where(left, c_new, d_new)
+        _, vx = _max_vswr(S, x, z0, target, mask, k_bounds, nk)
+        c, vc, d, vd = (np.where(left, c_new, d), np.where(left, vx, vd),
+                        np.where(left, c, d_new), np.where(left, vc, vx))
+    dphi = np.where(vc <= vd, c, d)
+    # keep the grid point if the refinement did not improve it
+    _, v_ref = _max_vswr(S, dphi, z0, target, mask, k_bounds, nk)
+    worse = ~(v_ref <= v[best, np.arange(nf)])
+    dphi = np.mod(np.where(worse, grid[best], dphi), 2 * np.pi)
+
+    k, vswr = _max_vswr(S, dphi, z0, target, mask, k_bounds, nk)
+    gamma, _, P = _active(S, dphi, k, z0, mask)
+    nan = ~ok
+    dphi[nan], k[nan], vswr[nan] = np.nan, np.nan, np.nan
+    gamma[nan], P[nan] = np.nan, np.nan
+    return {'dphi': dphi, 'k': k, 'vswr': vswr, 'gamma': gamma, 'P': P}
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chunked design scans of the Stix minority tail temperature.
+
+Same model as Tail_energy.py:
+
+    tau_s = 0.012 A Te^1.5 / (Z² ne/1e20)              slowing-down time [s]
+    xi    = P tau_s / (3 n_min Te)                      n_min = conc·ne
+    T_eff = Te (1 + xi)                                 tail temperature [keV]
+
+scan_tail_energy evaluates the model on the outer product of 1D axes
+Te × ne × P × conc × species by chunks of (Te, ne) rows, broadcasting
+the axes (no meshgrid is built), and streams the results into a store on disk, so that scans of
+1e8 points need only the memory of one chunk:
+
+    from tail_scan import scan_tail_energy, load_tail_scan
+    scan_tail_energy('scan_D', Te, ne, P, conc, Z=[1, 1], A=[2, 1])
+    out = load_tail_scan('scan_D')
+    out['T_eff'][:, 3, :, :, 0]      # memory-mapped, read on demand
+
+Store layout (a directory):
+  axes.npz         : Te, ne, P, conc, Z, A
+  T_eff.npy, xi.npy : shape (nTe, nne, nP, nconc, nspecies)
+  tau_s.npy        : shape (nTe, nne, 1, 1, nspecies) (independent of P, conc)
+"""
+
+import os
+import numpy as np
+from ICRF_parameters import Const
+
+
+def slowing_down_time(Te, ne, Z, A):
+    """Slowing-down time tau_s [s] for Te [keV], ne [m^-3]."""
+    return 0.012 * np.asarray(A) * np.asarray(Te)**1.5 / (np.asarray(Z)**2 * np.asarray(ne) / 1e20)
+
+
+def tail_parameters(Te, ne, P, conc, Z, A):
+    """
+    Stix tail parameters; all arguments broadcast.
+
+    Parameters
+    ----------
+    Te : float or ndarray
+        Electron temperature [keV].
+    ne : float or ndarray
+        Electron density [m^-3].
+    P : float or ndarray
+        Absorbed power density [W/m^3].
+    conc : float or ndarray
+        Minority concentration n_min/ne.
+    Z, A : float or ndarray
+        Charge and mass numbers of the minority.
+
+    Returns
+    -------
+    tau_s : ndarray
+        Slowing-down time [s].
+    xi : ndarray
+        Stix parameter P tau_s / (3 n_min Te).
+    T_eff : ndarray
+        Tail temperature Te (1 + xi) [keV].
+    """
+    Te = np.asarray(Te, dtype=float)
+    ne = np.asarray(ne, dtype=float)
+    tau_s = slowing_down_time(Te, ne, Z, A)
+    xi = np.asarray(P) * tau_s / (3.0 * ne * np.asarray(conc) * Te * 1e3 * Const.eV_to_J)
+    return tau_s, xi, Te * (1.0 + xi)
+
+
+def _open(path, shape, dtype):
+    return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+
+def scan_tail_energy(store, Te, ne, P, conc, Z, A, chunk_size=1 << 21,
+                     dtype=np.float32):
+    """
+    Evaluate the tail model on Te × ne × P × conc × species and write it
+    to a store directory (see module docstring).
+
+    Parameters
+    ----------
+    store : str
+        Output directory (created; existing arrays are overwritten).
+    Te, ne, P, conc : 1D array_like
+        Scan axes: Te [keV], ne [m^-3], P [W/m^3], conc = n_min/ne.
+    Z, A : 1D array_like
+        Charge and mass numbers of the minority species (species axis).
+    chunk_size : int
+        Number of points evaluated at once (at least one (P, conc,
+        species) block per (Te, ne) pair).
+    dtype : numpy dtype
+        Storage precision (the model is evaluated in float64).
+
+    Returns
+    -------
+    shape : tuple
+        Shape (nTe, nne, nP, nconc, nspecies) of the stored scan.
+    """
+    axes = [np.atleast_1d(np.asarray(v, dtype=float)) for v in (Te, ne, P, conc, Z, A)]
+    if any(v.ndim != 1 for v in axes) or axes[4].shape != axes[5].shape:
+        raise ValueError("Scan axes must be 1D and Z, A of the same length.")
+    Te, ne, P, conc, Z, A = axes
+    shape = (Te.size, ne.size, P.size, conc.size, Z.size)
+    os.makedirs(store, exist_ok=True)
+    np.savez(os.path.join(store, 'axes.npz'), Te=Te, ne=ne, P=P, conc=conc, Z=Z, A=A)
+
+    # tau_s does not depend on P and conc: stored with singleton axes
+    tau_s = slowing_down_time(Te[:, None, None], ne[None, :, None], Z, A)
+    np.save(os.path.join(store, 'tau_s.npy'), tau_s[:, :, None, None, :].astype(dtype))
+
+    # chunks are groups of (Te, ne) rows; each row (nP, nconc, nspecies) is
+    # evaluated by broadcasting the axes, never expanded
+    row = shape[2:]
+    nrow = Te.size * ne.size
+    step = max(1, chunk_size // int(np.prod(row)))
+    Pg, cg = P[:, None, None], conc[None, :, None]
+    tmp = {k: os.path.join(store, f'{k}.npy.tmp') for k in ('xi', 'T_eff')}
+    out = {k: _open(p, shape, dtype) for k, p in tmp.items()}
+    rows = {k: v.reshape((nrow,) + row) for k, v in out.items()}
+    for start in range(0, nrow, step):
+        stop = min(start + step, nrow)
+        i, j = np.unravel_index(np.arange(start, stop), shape[:2])
+        Tc = Te[i][:, None, None, None]
+        nc = ne[j][:, None, None, None]
+        _, xi, T_eff = tail_parameters(Tc, nc, Pg, cg, Z, A)
+        rows['xi'][start:stop] = xi
+        rows['T_eff'][start:stop] = T_eff
+    for v in out.values():
+        v.flush()
+    del out, rows       # close the memory maps before renaming
+    for k, p in tmp.items():
+        os.replace(p, os.path.join(store, f'{k}.npy'))
+    return shape
+
+
+def load_tail_scan(store, mmap_mode='r'):
+    """
+    Open a store written by scan_tail_energy.
+
+    Returns
+    -------
+    out : dict
+        Axes 'Te', 'ne', 'P', 'conc', 'Z', 'A' (1D arrays) and
+        'tau_s', 'xi', 'T_eff' (memory-mapped unless mmap_mode is None;
+        tau_s keeps its singleton P and conc axes and broadcasts).
+    """
+    with np.load(os.path.join(store, 'axes.npz')) as ax:
+        out = {k: ax[k] for k in ax.files}
+    for k in ('tau_s', 'xi', 'T_eff'):
+        out[k] = np.load(os.path.join(store, f'{k}.npy'), mmap_mode=mmap_mode)
+    return out
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch loading of touchstone files for parameter studies.
+
+A set of files (e.g. one CST export per antenna geometry) is read in a
+process pool and stacked in one array of shape
+(nfiles, nfreq, nports, nports). The CST ``! Parameters = {...}`` header
+of each file is collected in a column table, so that the S-parameters can
+be analysed against the geometry parameters in one vectorized pass:
+
+    files, f, S, par = load_touchstone_batch("runs/*.s4p")
+    gap = par['strap_gapfs']                 # (nfiles,)
+    S11_min = np.abs(S[:, :, 0, 0]).min(axis=1)
+"""
+
+import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from load import load_touchstone
+from touchstone_cache import load_touchstone_cached
+
+_CST_PARAMETERS = re.compile(r'^!\s*Parameters\s*=\s*\{(.*)\}', re.IGNORECASE)
+
+
+def _to_value(text):
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_cst_parameters(fname):
+    """
+    Read the CST ``! Parameters = {name=value; ...}`` comment of a file.
+
+    Returns:
+      params : dict
+          Parameter values (float when numeric, str otherwise); empty if the
+          file has no such header.
+    """
+    params = {}
+    with open(fname, 'r') as fh:
+        for line in fh:
+            line = line.strip()
+            if line and not line.startswith('!'):
+                break  # end of the comment header
+            m = _CST_PARAMETERS.match(line)
+            if m is None:
+                continue
+            for item in m.group(1).split(';'):
+                name, sep, value = item.partition('=')
+                if sep:
+                    params[name.strip()] = _to_value(value.strip())
+            break
+    return params
+
+
+def _load_one(args):
+    fname, cache_dir = args
+    if cache_dir is None:
+        f, S, z0 = load_touchstone(fname)
+    else:
+        f, S, z0 = load_touchstone_cached(fname, cache_dir, mmap_mode=None)
+    return f, S, z0, parse_cst_parameters(fname)
+
+
+def _parameter_table(param_dicts):
+    """Turn a list of dicts into columns, NaN (or None) where missing."""
+    names = []
+    for params in param_dicts:
+        names.extend(name for name in params if name not in names)
+    table = {}
+    for name in names:
+        values = [params.get(name) for params in param_dicts]
+        if all(isinstance(v, float) or v is None for v in values):
+            table[name] = np.array([np.nan if v is None else v for v in values])
+        else:
+            table[name] = np.array(values, dtype=object)
+    return table
+
+
+def load_touchstone_batch(files, processes=None, cache_dir=None, chunksize=4):
+    """
+    Load many touchstone files in parallel and stack them.
+
+    Parameters:
+      files : str or list of str
+          Glob pattern (e.g. 'runs/*.s4p') or explicit list of files.
+      processes : int, optional
+          Number of worker processes (default: number of CPUs); 1 loads
+          the files serially in the calling process.
+      cache_dir : str, optional
+          If given, files are read through touchstone_cache with this
+          cache directory.
+      chunksize : int
+          Number of files sent to a worker at once.
+
+    Returns:
+      files : list of str
+          Loaded files, in the order of the first axis of S.
+      f : numpy.ndarray
+          Common frequency points in Hz, shape (nfreq,).
+      S : numpy.ndarray
+          Complex array of shape (nfiles, nfreq, nports, nports).
+      params : dict of numpy.ndarray
+          CST parameters, one array of length nfiles per parameter name.
+    """
+    if isinstance(files, (str, os.PathLike)):
+        files = sorted(glob.glob(os.fspath(files)))
+    else:
+        files = [os.fspath(fname) for fname in files]
+    if not files:
+        raise ValueError("No touchstone file to load.")
+
+    jobs = [(fname, cache_dir) for fname in files]
+    if processes == 1:
+        results = map(_load_one, jobs)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=processes)
+        results = executor.map(_load_one, jobs, chunksize=chunksize)
+
+    try:
+        f = S = None
+        param_dicts = []
+        for k, (fk, Sk, z0, params) in enumerate(results):
+            if S is None:
+                f = np.asarray(fk)
+                z0_ref = z0
+                S = np.empty((len(files),) + Sk.shape, dtype=Sk.dtype)
+            elif Sk.shape != S.shape[1:] or not np.array_equal(fk, f):
+                raise ValueError(f"{files[k]}: frequency points or number of "
+                                 "ports differ from the first file.")
+            elif z0 != z0_ref:
+                raise ValueError(f"{files[k]}: reference impedance differs "
+                                 "from the first file.")
+            S[k] = Sk
+            param_dicts.append(params)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return files, f, S, _parameter_table(param_dicts)
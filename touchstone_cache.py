@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Binary cache for parsed touchstone files.
+
+The first call of ``load_touchstone_cached`` parses the ASCII file with
+``load.load_touchstone`` and stores the frequency and S arrays as ``.npy``
+files in a cache directory; later calls memory-map these arrays instead of
+parsing the text again.
+
+Cache layout (one entry per file content):
+  <digest>.f.npy, <digest>.S.npy : arrays
+  <digest>.json                  : reference impedance and source file
+  <stamp>.key                    : digest and source path of a
+                                   (path, size, mtime) triplet
+
+The stamp avoids hashing the file content when it has not changed; when
+the stamp is missing (new path, touched or copied file) the content is
+hashed and an existing entry with the same digest is reused. The least
+recently used entries are removed when the cache grows above ``max_bytes``,
+together with the stamps of removed entries or of changed source files.
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+from load import load_touchstone
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'icrf-tools')
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def cache_dir_default():
+    """Cache directory, from $ICRF_TOOLS_CACHE if set."""
+    return os.environ.get('ICRF_TOOLS_CACHE', DEFAULT_CACHE_DIR)
+
+
+def _stamp(fname):
+    st = os.stat(fname)
+    key = f"{os.path.abspath(fname)}|{st.st_size}|{st.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _content_digest(fname, blocksize=1 << 20):
+    h = hashlib.blake2b(digest_size=20)
+    with open(fname, 'rb') as fh:
+        for block in iter(lambda: fh.read(blocksize), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _read_key(path):
+    """Digest and source path stored in a stamp file (source may be None)."""
+    with open(path, 'r') as fh:
+        lines = fh.read().splitlines()
+    if not lines:
+        raise ValueError(f"Empty stamp file {path}.")
+    return lines[0].strip(), (lines[1] if len(lines) > 1 else None)
+
+
+def _entry_paths(cache_dir, digest):
+    base = os.path.join(cache_dir, digest)
+    return base + '.f.npy', base + '.S.npy', base + '.json'
+
+
+def _write_atomic(path, writer):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as fh:
+        writer(fh)
+    os.replace(tmp, path)
+
+
+def _read_entry(cache_dir, digest, mmap_mode):
+    f_path, S_path, meta_path = _entry_paths(cache_dir, digest)
+    try:
+        with open(meta_path, 'r') as fh:
+            meta = json.load(fh)
+        f = np.load(f_path, mmap_mode=mmap_mode)
+        S = np.load(S_path, mmap_mode=mmap_mode)
+        os.utime(meta_path)  # mark as recently used
+    except (OSError, ValueError):
+        # missing, partly written or concurrently evicted: a cache miss
+        return None
+    return f, S, meta['z0']
+
+
+def _write_entry(cache_dir, digest, fname, f, S, z0):
+    f_path, S_path, meta_path = _entry_paths(cache_dir, digest)
+    _write_atomic(f_path, lambda fh: np.save(fh, f))
+    _write_atomic(S_path, lambda fh: np.save(fh, S))
+    meta = {'z0': z0, 'source': os.path.abspath(fname)}
+    # the metadata is written last: an entry is valid once it exists
+    _write_atomic(meta_path, lambda fh: fh.write(json.dumps(meta).encode()))
+
+
+def evict(cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Remove least recently used entries until the cache fits in max_bytes.
+
+    Stamp files are pruned as well when their entry is gone or when their
+    source file has been modified or removed since they were written.
+
+    Returns:
+      removed : list of str
+          Digests of the removed entries.
+    """
+    cache_dir = cache_dir or cache_dir_default()
+    entries = {}
+    for name in os.listdir(cache_dir):
+        digest, _, ext = name.partition('.')
+        if ext not in ('f.npy', 'S.npy', 'json'):
+            continue
+        st = os.stat(os.path.join(cache_dir, name))
+        size, last = entries.get(digest, (0, 0))
+        if ext == 'json':
+            last = st.st_mtime_ns
+        entries[digest] = (size + st.st_size, last)
+
+    total = sum(size for size, _ in entries.values())
+    removed = []
+    for digest, (size, _) in sorted(entries.items(), key=lambda kv: kv[1][1]):
+        if total <= max_bytes:
+            break
+        for path in _entry_paths(cache_dir, digest):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+        removed.append(digest)
+
+    # stamps of removed entries, or of source files that changed since
+    alive = set(entries) - set(removed)
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.key'):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            digest, source = _read_key(path)
+            orphan = digest not in alive
+            if not orphan and source is not None:
+                try:
+                    orphan = _stamp(source) + '.key' != name
+                except OSError:     # source removed
+                    orphan = True
+            if orphan:
+                os.remove(path)
+        except (OSError, ValueError):
+            pass
+    return removed
+
+
+def clear_cache(cache_dir=None):
+    """Remove every entry of the cache directory."""
+    evict(cache_dir, max_bytes=0)
+    cache_dir = cache_dir or cache_dir_default()
+    for name in os.listdir(cache_dir):
+        if name.endswith('.key'):
+            os.remove(os.path.join(cache_dir, name))
+
+
+def load_touchstone_cached(fname, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES,
+                           mmap_mode='r'):
+    """
+    Same as ``load.load_touchstone`` but backed by a binary cache.
+
+    Parameters:
+      fname : str
+          Name of the touchstone file.
+      cache_dir : str, optional
+          Cache directory (default: $ICRF_TOOLS_CACHE or ~/.cache/icrf-tools).
+      max_bytes : int
+          Size limit of the cache, enforced after each new entry.
+      mmap_mode : str or None
+          Passed to ``numpy.load``; 'r' gives read-only memory-mapped arrays,
+          None loads the arrays in memory.
+
+    Returns:
+      f, S, z0 : as ``load.load_touchstone``.
+    """
+    cache_dir = cache_dir or cache_dir_default()
+    os.makedirs(cache_dir, exist_ok=True)
+
+    stamp_path = os.path.join(cache_dir, _stamp(fname) + '.key')
+    try:
+        out = _read_entry(cache_dir, _read_key(stamp_path)[0], mmap_mode)
+        if out is not None:
+            return out
+    except (OSError, ValueError):
+        pass
+
+    digest = _content_digest(fname)
+    out = _read_entry(cache_dir, digest, mmap_mode)
+    if out is None:
+        f, S, z0 = load_touchstone(fname)
+        _write_entry(cache_dir, digest, fname, f, S, z0)
+        evict(cache_dir, max_bytes)
+        out = _read_entry(cache_dir, digest, mmap_mode)
+        if out is None:  # entry larger than the whole cache
+            return f, S, z0
+    key = f"{digest}\n{os.path.abspath(fname)}\n"
+    _write_atomic(stamp_path, lambda fh: fh.write(key.encode()))
+    return out
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rational (vector-fitting) model of S-parameters.
+
+Coarse touchstone sweeps are replaced by a common-pole model
+
+    S(s) = Σ_k R_k / (s - p_k) + D,        s = j 2π f,
+
+fitted to all S_ij at once (vector fitting, Gustavsen and Semlyen 1999,
+with the fast QR formulation of Deschrijver et al. 2008). The poles are
+stable and come in complex-conjugate pairs, so the model is real in the
+time domain. Evaluating it at any frequency is a matrix product of the
+(nf, npoles) pole terms with the (npoles, n·n) residues:
+
+    f, S, z0 = load_touchstone("example/smatrix_aug-like.s4p")
+    model = vector_fit(f, S, npoles=12, z0=z0)
+    model = enforce_passivity(model)                       # optional
+    S_fine = evaluate_model(model, np.linspace(f[0], f[-1], 2_000_001))
+    save_model("antenna_vf.npz", model);  model = load_model("antenna_vf.npz")
+
+The model is a dict: 'poles' (npoles,), 'residues' (npoles, n, n) [rad/s],
+'D' (n, n), 'z0', 'f_range' (fitted band [Hz]) and 'rms_error'.
+"""
+
+import numpy as np
+
+
+def _split(poles):
+    """Real poles and upper members of the complex pairs (stable, sorted)."""
+    poles = np.asarray(poles, dtype=complex)
+    poles = np.where(poles.real > 0, -poles.conj(), poles)      # flip unstable
+    scale = np.maximum(np.abs(poles), 1e-300)
+    real = np.abs(poles.imag) <= 1e-8 * scale
+    half = np.concatenate([poles[real].real.astype(complex),
+                           poles[~real & (poles.imag > 0)]])
+    return half[np.argsort(half.imag)]
+
+
+def _basis(s, half):
+    """
+    Real-coefficient basis: 1/(s-p) for a real pole and, for a pair,
+    1/(s-p) + 1/(s-p*) and j/(s-p) - j/(s-p*). Shape (ns, N).
+    """
+    cols = []
+    for p in half:
+        a = 1.0 / (s - p)
+        if p.imag == 0:
+            cols.append(a)
+        else:
+            b = 1.0 / (s - np.conj(p))
+            cols.extend([a + b, 1j * (a - b)])
+    return np.column_stack(cols)
+
+
+def _real_state(half, c):
+    """A - b cᵀ of the real state-space form of σ(s) = 1 + Σ c_k φ_k(s)."""
+    N = c.size
+    A = np.zeros((N, N))
+    b = np.zeros(N)
+    k = 0
+    for p in half:
+        if p.imag == 0:
+            A[k, k] = p.real
+            b[k] = 1.0
+            k += 1
+        else:
+            A[k:k + 2, k:k + 2] = [[p.real, p.imag], [-p.imag, p.real]]
+            b[k] = 2.0
+            k += 2
+    return A - np.outer(b, c)
+
+
+def _full_residues(half, C):
+    """Complex residues of every pole (pairs expanded) from real coefficients C (N, m)."""
+    poles, res = [], []
+    k = 0
+    for p in half:
+        if p.imag == 0:
+            poles.append(p)
+            res.append(C[k].astype(complex))
+            k += 1
+        else:
+            r = C[k] + 1j * C[k + 1]
+            poles.extend([p, np.conj(p)])
+            res.extend([r, np.conj(r)])
+            k += 2
+    return np.array(poles), np.array(res)
+
+
+def _ri(x):
+    """Stack real and imaginary parts along the first axis."""
+    return np.concatenate([x.real, x.imag], axis=0)
+
+
+def _initial_poles(f, npoles, w_scale):
+    """Weakly damped complex pairs spread over the band (scaled units)."""
+    beta = 2 * np.pi * np.linspace(max(f[0], f[-1] / 100), f[-1], npoles // 2) / w_scale
+    half = -beta / 100 + 1j * beta
+    if npoles % 2:
+        half = np.concatenate([[-2 * np.pi * f[-1] / w_scale / 2 + 0j], half])
+    return half
+
+
+def vector_fit(f, S, npoles=10, niter=10, z0=50.0, poles=None):
+    """
+    Fit a common-pole rational model to stacked S-parameters.
+
+    Parameters:
+      f : numpy.ndarray
+          Frequencies [Hz], shape (nf,).
+      S : numpy.ndarray
+          Complex S matrices of shape (nf, n, n) (load.load_touchstone).
+      npoles : int
+          Number of poles (complex pairs count twice).
+      niter : int
+          Number of pole-relocation iterations.
+      z0 : float
+          Reference impedance stored with the model.
+      poles : numpy.ndarray, optional
+          Starting poles [rad/s] (default: weakly damped pairs spread over
+          the band).
+
+    Returns:
+      model : dict
+          See the module docstring.
+    """
+    f = np.asarray(f, dtype=float)
+    S = np.asarray(S, dtype=complex)
+    if S.ndim != 3 or S.shape[0] != f.size or S.shape[1] != S.shape[2]:
+        raise ValueError("S must have shape (nf, n, n) matching f.")
+    n = S.shape[1]
+    H = S.reshape(f.size, -1)
+    m = H.shape[1]
+    # work in s / w_scale for conditioning
+    w_scale = 2 * np.pi * f[-1]
+    s = 2j * np.pi * f / w_scale
+    half = _initial_poles(f, npoles, w_scale) if poles is None else _split(np.asarray(poles) / w_scale)
+
+    for _ in range(niter):
+        Phi = _basis(s, half)
+        N = Phi.shape[1]
+        # fast VF: per response, QR of [Φ 1 | -h Φ] keeps the σ block only
+        rows = []
+        for k in range(m):
+            A = _ri(np.column_stack([Phi, np.ones(f.size), -H[:, k, None] * Phi]))
+            Q, R = np.linalg.qr(np.column_stack([A, _ri(H[:, k])]))
+            rows.append(R[N + 1:2 * N + 1, N + 1:])
+        R = np.vstack(rows)
+        c = np.linalg.lstsq(R[:, :N], R[:, N], rcond=None)[0]
+        half = _split(np.linalg.eigvals(_real_state(half, c)))
+
+    # residues and D of all responses with the final poles
+    Phi = _basis(s, half)
+    A = _ri(np.column_stack([Phi, np.ones(f.size)]))
+    C = np.linalg.lstsq(A, _ri(H), rcond=None)[0]
+    full, res = _full_residues(half, C[:-1])
+    model = {'poles': full * w_scale,
+             'residues': (res * w_scale).reshape(-1, n, n),
+             'D': C[-1].reshape(n, n),
+             'z0': float(z0),
+             'f_range': np.array([f[0], f[-1]])}
+    model['rms_error'] = float(np.sqrt(np.mean(np.abs(evaluate_model(model, f) - S)**2)))
+    return model
+
+
+def evaluate_model(model, f, chunk_size=1 << 16):
+    """
+    S matrices of a model at arbitrary frequencies.
+
+    Parameters:
+      model : dict
+          From vector_fit or load_model.
+      f : float or numpy.ndarray
+          Frequencies [Hz].
+      chunk_size : int
+          Number of frequencies evaluated at once.
+
+    Returns:
+      S : numpy.ndarray
+          Shape f.shape + (n, n).
+    """
+    f = np.asarray(f, dtype=float)
+    p = model['poles']
+    n = model['D'].shape[0]
+    R = model['residues'].reshape(p.size, -1)
+    D = model['D'].reshape(-1)
+    flat = f.reshape(-1)
+    out = np.empty((flat.size, n * n), dtype=complex)
+    for start in range(0, flat.size, chunk_size):
+        s = 2j * np.pi * flat[start:start + chunk_size, None]
+        out[start:start + chunk_size] = (1.0 / (s - p)) @ R + D
+    return out.reshape(f.shape + (n, n))
+
+
+def passivity_violation(model, f):
+    """Largest singular value of S at f minus 1 (> 0 where not passive)."""
+    return np.linalg.svd(evaluate_model(model, f), compute_uv=False)[..., 0] - 1.0
+
+
+def enforce_passivity(model, f=None, margin=1e-3, weight=1e-2, maxiter=20):
+    """
+    Perturb the residues and D until the singular values of S do not exceed
+    1 on the frequencies f.
+
+    Each iteration clips the violating singular values to 1 - margin and
+    solves for the smallest real residue correction reproducing the clipped
+    matrices, while keeping the model unchanged (with the given relative
+    weight) on the rest of the grid; the poles are not modified.
+
+    Parameters:
+      model : dict
+          From vector_fit.
+      f : numpy.ndarray, optional
+          Check frequencies [Hz] (default: 4001 points over f_range).
+      margin : float
+          Distance to 1 of the corrected singular values.
+      weight : float
+          Weight of the passive frequencies in the correction.
+      maxiter : int
+          Maximum number of corrections.
+
+    Returns:
+      model : dict
+          A new model; 'passive' tells whether the check grid is passive.
+    """
+    model = dict(model)
+    if f is None:
+        f = np.linspace(*model['f_range'], 4001)
+    n = model['D'].shape[0]
+    w_scale = 2 * np.pi * model['f_range'][1]
+    half = _split(model['poles'] / w_scale)
+    Phi = np.column_stack([_basis(2j * np.pi * f / w_scale, half), np.ones(f.size)])
+    passive = False
+    for _ in range(maxiter):
+        S = evaluate_model(model, f)
+        U, sv, Vh = np.linalg.svd(S)
+        bad = sv[:, 0] > 1.0
+        if not bad.any():
+            passive = True
+            break
+        target = np.minimum(sv, 1.0 - margin)
+        dS = np.zeros_like(S)
+        dS[bad] = (U[bad] * (target[bad] - sv[bad])[:, None, :]) @ Vh[bad]
+        wgt = np.where(bad, 1.0, weight)[:, None]
+        A = _ri(wgt * Phi)
+        dC = np.linalg.lstsq(A, _ri(wgt * dS.reshape(f.size, -1)), rcond=None)[0]
+        _, dres = _full_residues(half, dC[:-1])
+        model['residues'] = model['residues'] + (dres * w_scale).reshape(-1, n, n)
+        model['D'] = model['D'] + dC[-1].reshape(n, n)
+    model['passive'] = passive
+    return model
+
+
+def save_model(fname, model):
+    """Write a model to a .npz file."""
+    np.savez(fname, **{k: np.asarray(v) for k, v in model.items()})
+
+
+def load_model(fname):
+    """Read a model written by save_model."""
+    with np.load(fname) as data:
+        model = {k: data[k] for k in data.files}
+    for k in ('z0', 'rms_error'):
+        if k in model:
+            model[k] = float(model[k])
+    if 'passive' in model:
+        model['passive'] = bool(model['passive'])
+    return model